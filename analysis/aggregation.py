@@ -0,0 +1,202 @@
+import functools
+import gzip
+import io
+import lzma
+import operator
+from os import PathLike
+from pathlib import Path
+
+import pandas as pd
+
+CONFIG_COLUMNS = ['alg', 'heuristic-optimal', 'heuristic-greedy', 'weight', 'epsilon']
+# Search telemetry of the drivers, missing from the logs of older sweeps
+MEMORY_VALUES = ['touched', 'unique-expanded', 'memory', 'peak-open', 'peak-closed']
+SUMMARY_VALUES = ['expanded', 'quality', 'time'] + MEMORY_VALUES
+LOG_SUFFIXES = ['.out', '.txt', '.log']
+COMPRESSED_SUFFIXES = ['.gz', '.xz', '.zst']
+
+
+# The summary frame has one row per configuration and is what the tables and figures are generated from. It is built
+# from mergeable partial aggregates (count, sum, sum of squares, min and max per value, and a bitmask of the instance
+# ids seen), so it can be computed either from the full results frame or by streaming the logs one chunk at a time,
+# with memory bounded by the number of configurations instead of the number of rows.
+
+
+def is_log_file(file_path: Path, suffixes=LOG_SUFFIXES):
+    # Plain logs, or logs compressed by the sweep scripts (e.g., stp_gbfs_e1.out.gz)
+    if file_path.suffix in COMPRESSED_SUFFIXES:
+        return Path(file_path.stem).suffix in suffixes
+    return file_path.suffix in suffixes
+
+
+def open_log(file_path: Path):
+    # Opens a log for reading text, decompressing it on the fly if needed
+    if file_path.suffix == '.gz':
+        return gzip.open(file_path, 'rt')
+    if file_path.suffix == '.xz':
+        return lzma.open(file_path, 'rt')
+    if file_path.suffix == '.zst':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(f"Reading {file_path} requires the zstandard package (pip install zstandard)")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True))
+    return open(file_path, 'r')
+
+
+def iter_log_files(dir_path: str | PathLike[str], suffixes=LOG_SUFFIXES):
+    # Every log once: a log that is both plain and compressed (compressed without removing it, or rerun with another
+    # COMPRESS) is only read from its most recently written copy
+    latest = {}
+    for file_path in Path(dir_path).rglob('*'):
+        if is_log_file(file_path, suffixes):
+            name = file_path.with_suffix('') if file_path.suffix in COMPRESSED_SUFFIXES else file_path
+            if name not in latest or file_path.stat().st_mtime > latest[name].stat().st_mtime:
+                latest[name] = file_path
+    return sorted(latest.values())
+
+
+def iter_chunks(dir_path: str | PathLike[str], parse_file, generate_df, files_per_chunk=1, heuristics=False):
+    # Yields generate_df of the parsed result logs (or init heuristic logs), files_per_chunk files at a time
+    chunk = []
+    for file_path in iter_log_files(dir_path):
+        df = parse_file(file_path)
+        if df.empty or (('init-ho' in df.columns) != heuristics):
+            continue
+        chunk.append(df)
+        if len(chunk) >= files_per_chunk:
+            yield generate_df(chunk)
+            chunk = []
+    if chunk:
+        yield generate_df(chunk)
+
+
+def instance_mask(ids):
+    return functools.reduce(operator.or_, (1 << int(i) for i in ids), 0)
+
+
+def partial_aggregate(df, values=SUMMARY_VALUES):
+    values = [value for value in values if value in df.columns]
+    df = df.assign(**{f'{value}-sq': df[value].astype(float) ** 2 for value in values})
+    grouped = df.groupby(CONFIG_COLUMNS)
+    agg = pd.DataFrame({'count': grouped.size()})
+    for value in values:
+        agg[f'{value}-count'] = grouped[value].count()  # Values missing from some rows do not count in their mean
+        agg[f'{value}-sum'] = grouped[value].sum()
+        agg[f'{value}-sumsq'] = grouped[f'{value}-sq'].sum()
+        agg[f'{value}-min'] = grouped[value].min()
+        agg[f'{value}-max'] = grouped[value].max()
+    agg['instances'] = grouped['id'].agg(instance_mask).astype(object)
+    return agg
+
+
+def merge_aggregates(left, right):
+    if left is None:
+        return right
+    combined = pd.concat([left, right])
+    aggfunc = {}
+    for column in combined.columns:
+        if column.endswith('-min'):
+            aggfunc[column] = 'min'
+        elif column.endswith('-max'):
+            aggfunc[column] = 'max'
+        elif column == 'instances':
+            aggfunc[column] = lambda masks: functools.reduce(operator.or_, masks, 0)
+        else:
+            aggfunc[column] = 'sum'
+    merged = combined.groupby(level=CONFIG_COLUMNS).agg(aggfunc)
+    merged['instances'] = merged['instances'].astype(object)
+    return merged
+
+
+def finalize_aggregate(agg):
+    summary = pd.DataFrame({'count': agg['count']})
+    summary['unique'] = agg['instances'].apply(lambda mask: bin(mask).count('1'))
+    for value in [column[:-4] for column in agg.columns if column.endswith('-sum')]:
+        count = agg[f'{value}-count'].where(agg[f'{value}-count'] > 0)
+        mean = agg[f'{value}-sum'] / count
+        summary[value] = mean
+        summary[f'{value}-std'] = (agg[f'{value}-sumsq'] / count - mean ** 2).clip(lower=0) ** 0.5
+        summary[f'{value}-min'] = agg[f'{value}-min']
+        summary[f'{value}-max'] = agg[f'{value}-max']
+    return summary.reset_index()
+
+
+def summary_pivot(summary_df, index, columns=None, values=('expanded', 'quality')):
+    # Same as summary_df.pivot_table with the means of values and the sum of count, but every mean is weighted by the
+    # count of runs of the summary rows, so it is the mean of the runs even when a cell holds configurations with
+    # unequal counts (e.g., pruned or partial runs)
+    values = list(values)
+    weighted = summary_df.assign(**{f'{value}-total': summary_df[value] * summary_df['count'] for value in values},
+                                 **{f'{value}-runs': summary_df['count'].where(summary_df[value].notna())
+                                    for value in values})
+    keys = ([index] if isinstance(index, str) else list(index)) + ([columns] if columns is not None else [])
+    pivot = weighted.groupby(keys)[['count'] + [f'{value}-{part}' for value in values for part in ['total', 'runs']]].sum()
+    if columns is not None:
+        pivot = pivot.unstack(columns)
+    means = {value: pivot[f'{value}-total'] / pivot[f'{value}-runs'].where(pivot[f'{value}-runs'] > 0)
+             for value in values}
+    return pd.concat({**means, 'count': pivot['count']}, axis=1)
+
+
+def weighted_mean(summary_df, value):
+    # Mean of value over summary rows, weighted by their count of runs
+    runs = summary_df['count'].where(summary_df[value].notna())
+    return (summary_df[value] * runs).sum() / runs.sum() if runs.sum() > 0 else float('nan')
+
+
+def summarize_results(result_df):
+    return finalize_aggregate(partial_aggregate(result_df))
+
+
+def stream_summary(chunks, prepare=None):
+    # prepare is applied to every chunk before it is aggregated (e.g., adding and verifying the solution quality)
+    agg = None
+    for chunk in chunks:
+        if prepare is not None:
+            chunk = prepare(chunk)
+        agg = merge_aggregates(agg, partial_aggregate(chunk))
+    return finalize_aggregate(agg)
+
+
+def add_optimal_solutions(solutions, chunk):
+    # Adds the solution costs of the optimal searches of a chunk to the distinct costs of every instance
+    filtered_df = chunk[(chunk['weight'] == 1) & (chunk['alg'] != 'gbfs')]
+    for id_value, solution in zip(filtered_df['id'], filtered_df['solution']):
+        solutions.setdefault(id_value, set()).add(solution)
+
+
+def distinct_optimal_solutions(solutions):
+    for id_value, values in solutions.items():
+        if len(values) > 1:
+            raise ValueError(f"Inconsistent solutions found for id: {id_value}")
+    return {id_value: values.pop() for id_value, values in sorted(solutions.items())}
+
+
+def stream_optimal_solutions(chunks):
+    # Same as get_optimal_solutions, but only keeps the distinct solution costs of every instance between chunks
+    solutions = {}
+    for chunk in chunks:
+        add_optimal_solutions(solutions, chunk)
+    return distinct_optimal_solutions(solutions)
+
+
+def stream_logs(dir_path, parse_file, generate_results_df, generate_init_heuristic_df, prepare=None):
+    # Parses every log once: returns the optimal solutions (see stream_optimal_solutions) and the summary (see
+    # stream_summary) of the result logs, and the init heuristic frame
+    solutions = {}
+    agg = None
+    heuristics = []
+    for file_path in iter_log_files(dir_path):
+        df = parse_file(file_path)
+        if df.empty:
+            continue
+        if 'init-ho' in df.columns:
+            heuristics.append(generate_init_heuristic_df([df]))
+            continue
+        chunk = generate_results_df([df])
+        add_optimal_solutions(solutions, chunk)
+        if prepare is not None:
+            chunk = prepare(chunk)
+        agg = merge_aggregates(agg, partial_aggregate(chunk))
+    return distinct_optimal_solutions(solutions), finalize_aggregate(agg), pd.concat(heuristics, ignore_index=True)
@@ -0,0 +1,17 @@
+import itertools
+from decimal import Decimal, ROUND_HALF_UP
+
+# The number format of the LaTeX tables and the line styles of the figures, shared by the analysis scripts
+COLORS = ['#000000', '#E69F00', '#56B4E9', '#009E73', '#F0E442', '#0072B2', '#D55E00', '#CC79A7', '#72CE6F']
+LINESTYLES = ['-', '--', '-.', ':']
+MARKERS = ['o', 's', 'D', '^', 'v', '*', 'x', 'P', 'H', '+']
+
+
+def round_half_up(value, decimals):
+    d = Decimal(value)
+    return d.quantize(Decimal('1e-{0}'.format(decimals)), rounding=ROUND_HALF_UP)
+
+
+def style_cycler():
+    # The (color, linestyle, marker) of every line of a figure
+    return zip(itertools.cycle(COLORS), itertools.cycle(LINESTYLES), itertools.cycle(MARKERS))
@@ -0,0 +1,25 @@
+# The -i arguments of the driver, written by subset_selection.py and load_balancing.py and read back by the latter
+
+
+def format_instance_args(ids):
+    # Formats instance ids the way ArgParameters::parseInstanceRanges reads them (ranges are [start, end))
+    ids = sorted(int(i) for i in ids)
+    parts = []
+    start = previous = ids[0]
+    for i in ids[1:] + [None]:
+        if i is not None and i == previous + 1:
+            previous = i
+            continue
+        parts.append(str(start) if start == previous else f'{start}-{previous + 1}')
+        if i is not None:
+            start = previous = i
+    return ' '.join(parts)
+
+
+def parse_instance_args(instance_args):
+    # The instance ids of -i arguments, the inverse of format_instance_args
+    ids = []
+    for part in instance_args.split():
+        start, _, end = part.partition('-')
+        ids.extend(range(int(start), int(end)) if end else [int(start)])
+    return ids
@@ -0,0 +1,117 @@
+import heapq
+import importlib
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from aggregation import CONFIG_COLUMNS, iter_log_files
+from instance_ranges import format_instance_args, parse_instance_args
+
+INSTANCES = 100
+
+
+def load_logs(domain, dir_path):
+    # The results and init heuristic frames of a domain's logs, either may be None (e.g., before the first sweep)
+    analysis = importlib.import_module(f'{domain}_analysis')
+    dfs = [analysis.parse_file(file_path) for file_path in iter_log_files(dir_path)]
+    results = [df for df in dfs if not df.empty and 'init-ho' not in df.columns]
+    heuristics = [df for df in dfs if not df.empty and 'init-ho' in df.columns]
+    return (analysis.generate_results_df(results) if results else None,
+            analysis.generate_init_heuristic_df(heuristics) if heuristics else None)
+
+
+def history_costs(result_df, metric='time'):
+    # The cost of running the whole sweep on every instance: the sum of its metric over all the configurations. Runs
+    # missing from a configuration (e.g., pruned ones) cost as much as the configuration's most expensive instance.
+    matrix = result_df.pivot_table(index=CONFIG_COLUMNS, columns='id', values=metric, aggfunc='mean')
+    matrix = matrix.apply(lambda row: row.fillna(row.max()), axis=1)
+    return matrix.sum(axis=0).to_dict()
+
+
+def cold_start_costs(h_df):
+    # Without past results the initial optimal heuristic is the best proxy of an instance's difficulty. It
+    # underestimates the spread of the actual costs, which grow exponentially with the solution cost.
+    return h_df.groupby('id')['init-ho'].sum().rename(int).to_dict()
+
+
+def estimate_costs(result_df, h_df, instances, metric='time'):
+    costs = history_costs(result_df, metric) if result_df is not None else cold_start_costs(h_df)
+    default = np.median(list(costs.values()))  # Instances that never ran
+    return {i: costs.get(i, default) for i in instances}
+
+
+def lpt_schedule(costs, workers):
+    # Longest processing time first: every instance, from the most expensive, goes to the least loaded worker
+    loads = [(0.0, worker) for worker in range(workers)]
+    assignment = [[] for _ in range(workers)]
+    for id_value, cost in sorted(costs.items(), key=lambda item: (-item[1], item[0])):
+        load, worker = heapq.heappop(loads)
+        assignment[worker].append(id_value)
+        heapq.heappush(loads, (load + cost, worker))
+    return [sorted(ids) for ids in assignment]
+
+
+def contiguous_schedule(instances, workers):
+    # The usual split of the instances into contiguous -i ranges
+    return [list(ids) for ids in np.array_split(sorted(instances), workers)]
+
+
+def makespan(assignment, costs):
+    return max(sum(costs[i] for i in ids) for ids in assignment)
+
+
+def read_schedule(file_path):
+    # Reads back the -i arguments written by main, one line per worker
+    with open(file_path, 'r') as f:
+        return [parse_instance_args(line) for line in f]
+
+
+def report(name, assignment, costs):
+    loads = [sum(costs[i] for i in ids) for ids in assignment]
+    print(f"{name}: makespan {max(loads):,.2f}, worker loads {min(loads):,.2f}-{max(loads):,.2f}")
+
+
+def main():
+    # python3 analysis/load_balancing.py <domain> <workers> [time|expanded] [--cold-start] [--achieved <new results>]
+    domain = sys.argv[1] if len(sys.argv) > 1 else 'stp'
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    metric = sys.argv[3] if len(sys.argv) > 3 and not sys.argv[3].startswith('--') else 'time'
+    schedule_file = Path(f'results/{domain}_workers.txt')
+    instances = list(range(INSTANCES))
+    if '--achieved' in sys.argv:
+        # Compares the schedules on the actual costs of a sweep that ran with the written schedule
+        achieved_dir = sys.argv[sys.argv.index('--achieved') + 1]
+        result_df, _ = load_logs(domain, achieved_dir)
+        if result_df is None:
+            sys.exit(f"No result logs in {achieved_dir} to compare the schedules on, run the sweep with the schedule of "
+                     f"{schedule_file} first")
+        costs = estimate_costs(result_df, None, instances, metric)
+        assignment = read_schedule(schedule_file)
+        print(f"Achieved {metric} of the {len(assignment)} workers of {schedule_file}")
+        report("LPT", assignment, costs)
+        report("Contiguous", contiguous_schedule(instances, len(assignment)), costs)
+        return
+    print("Loading data")
+    result_df, h_df = load_logs(domain, f'data/{domain}')
+    if '--cold-start' in sys.argv:
+        result_df = None
+    if result_df is None and h_df is None:
+        sys.exit(f"No init heuristic (h_df) logs in data/{domain} to schedule without past results, run the initial "
+                 f"heuristic of scripts/{domain}.sh first")
+    costs = estimate_costs(result_df, h_df, instances, metric)
+    source = f"past {metric}" if result_df is not None else "init-ho"
+    print(f"Scheduling {len(instances)} instances on {workers} workers by {source}")
+    assignment = lpt_schedule(costs, workers)
+    report("LPT", assignment, costs)
+    report("Contiguous", contiguous_schedule(instances, workers), costs)
+    print(f"Lower bound: makespan {max(sum(costs.values()) / workers, max(costs.values())):,.2f}")
+    Path("results").mkdir(exist_ok=True)
+    with open(schedule_file, 'w+') as f:
+        for ids in assignment:
+            f.write(format_instance_args(ids) + '\n')
+    print(f"Wrote the -i arguments of every worker to {schedule_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import gzip
+import importlib.util
+import lzma
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aggregation import COMPRESSED_SUFFIXES, iter_log_files
+from stp_analysis import parse_file  # All the domains share the same log format
+
+
+def open_compressed(file_path: Path):
+    if file_path.suffix == '.gz':
+        return gzip.open(file_path, 'wb')
+    if file_path.suffix == '.xz':
+        return lzma.open(file_path, 'wb')
+    import zstandard
+    return zstandard.ZstdCompressor().stream_writer(open(file_path, 'wb'), closefd=True)
+
+
+def compress_dir(dir_path, suffix, output_dir=None, remove=False):
+    # Compresses the plain logs of dir_path (into output_dir, keeping the layout, if given)
+    dir_path = Path(dir_path)
+    for file_path in iter_log_files(dir_path):
+        if file_path.suffix in COMPRESSED_SUFFIXES:
+            continue
+        target = Path(output_dir or dir_path) / file_path.relative_to(dir_path)
+        target = target.with_name(target.name + suffix)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, 'rb') as src, open_compressed(target) as dst:
+            shutil.copyfileobj(src, dst)
+        if remove:
+            file_path.unlink()
+
+
+def ingest(dir_path):
+    # Parses all the logs of dir_path, returns the parsing time, the bytes read from disk and the number of rows
+    files = iter_log_files(dir_path)
+    start = time.perf_counter()
+    rows = sum(len(parse_file(file_path)) for file_path in files)
+    return time.perf_counter() - start, sum(file_path.stat().st_size for file_path in files), rows
+
+
+def available_suffixes():
+    # zstandard is optional, without it the .zst logs are skipped
+    if importlib.util.find_spec('zstandard') is not None:
+        return COMPRESSED_SUFFIXES
+    return [suffix for suffix in COMPRESSED_SUFFIXES if suffix != '.zst']
+
+
+def benchmark(dir_path):
+    seconds, plain_bytes, rows = ingest(dir_path)
+    print(f"{'format':<8}{'bytes':>16}{'ratio':>8}{'seconds':>10}{'rows':>12}")
+    print(f"{'plain':<8}{plain_bytes:>16,}{1:>8.2f}{seconds:>10.2f}{rows:>12,}")
+    for suffix in available_suffixes():
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            compress_dir(dir_path, suffix, tmp_dir)
+            seconds, compressed_bytes, compressed_rows = ingest(tmp_dir)
+        if compressed_rows != rows:
+            raise ValueError(f"Parsed {compressed_rows} rows from the {suffix} logs instead of {rows}")
+        print(f"{suffix[1:]:<8}{compressed_bytes:>16,}{plain_bytes / compressed_bytes:>8.2f}{seconds:>10.2f}{rows:>12,}")
+
+
+def main():
+    # python3 analysis/log_compression.py <dir> --benchmark, or <dir> <gz|xz|zst> [--remove] to compress existing logs
+    dir_path = sys.argv[1] if len(sys.argv) > 1 else 'data/stp'
+    if '--benchmark' in sys.argv:
+        benchmark(dir_path)
+    else:
+        suffix = '.' + (sys.argv[2] if len(sys.argv) > 2 else 'gz')
+        if suffix not in COMPRESSED_SUFFIXES:
+            raise ValueError(f"Unknown compression format: {suffix[1:]}")
+        compress_dir(dir_path, suffix, remove='--remove' in sys.argv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import importlib
+import math
+import sys
+from pathlib import Path
+
+from matplotlib import pyplot as plt
+
+from aggregation import iter_chunks, stream_summary
+from formatting import round_half_up, style_cycler
+from result_set import ResultSet
+
+INSTANCES = 100
+TABLE_COLUMNS = {'expanded': 'Expanded', 'unique-expanded': 'Unique', 'touched': 'Touched', 'memory': 'Memory',
+                 'peak-open': 'Peak open', 'peak-closed': 'Peak closed'}
+
+
+# The memory footprint of every configuration, from the search telemetry of the [R] lines: the nodes touched (all
+# successors generated), the unique nodes expanded, the nodes stored by the search when it ended (memory), and the
+# peak sizes of the open and closed lists during the search (of WA*, GBFS and IOS alike).
+
+
+def load_summary(domain):
+    analysis = importlib.import_module(f'{domain}_analysis')
+    return stream_summary(iter_chunks(f'data/{domain}', analysis.parse_file, analysis.generate_results_df))
+
+
+def gen_memory_table_latex(summary, domain):
+    summary_df = summary.where(alg=['wa', 'gbfs', 'ios']).frame()
+    columns = [column for column in TABLE_COLUMNS if column in summary_df.columns]
+    latex_str = r"\begin{tabular}{ccccc" + ('r' * len(columns)) + "}\n"
+    latex_str += '\\toprule\nAlg & Optimal & Greedy & Weight & Epsilon'
+    for column in columns:
+        latex_str += f' & {TABLE_COLUMNS[column]}'
+    latex_str += ' \\\\\n\\midrule\n'
+    summary_df = summary_df.sort_values(by=['alg', 'heuristic-optimal', 'heuristic-greedy', 'epsilon', 'weight'],
+                                        ascending=[False, True, True, False, True])
+    for _, row in summary_df.iterrows():
+        latex_str += (f"{row['alg'].upper()} & {row['heuristic-optimal']} & {row['heuristic-greedy']} & "
+                      f"{row['weight']:g} & {round_half_up(row['epsilon'], 2)}")
+        if row['count'] != INSTANCES:
+            latex_str += f" & \\multicolumn{{{len(columns)}}}{{c}}{{\\#{int(row['count'])}}}"
+        else:
+            for column in columns:
+                value = row[column]
+                latex_str += ' & -' if math.isnan(value) else f' & {round_half_up(value, 0):,}'
+        latex_str += ' \\\\\n'
+    latex_str += '\\bottomrule\n\\end{tabular}'
+    with open(f'results/latex/{domain}_memory.tex', 'w+') as f:
+        f.write(latex_str)
+
+
+def generate_memory_figures(summary, domain, alg, column='memory', legend=True):
+    # One figure per heuristic pair (e.g., the pattern database splits of ToH), the runs of different pairs are not
+    # comparable
+    pairs = summary.where(alg=alg).frame()[['heuristic-optimal', 'heuristic-greedy']].drop_duplicates()
+    for ho, hg in pairs.itertuples(index=False):
+        name = f'{domain}_{alg}_{column}' if len(pairs) == 1 else f'{domain}_{ho}_{alg}_{column}'
+        generate_memory_figure(summary.where(heuristic_optimal=ho, heuristic_greedy=hg), name, alg, column, legend)
+
+
+def generate_memory_figure(summary, name, alg, column='memory', legend=True):
+    df = summary.where(alg=alg).frame()
+    result = {
+        eps: group.groupby("weight").filter(lambda g: g["count"].sum() == INSTANCES).groupby("weight")[column].mean().to_dict()
+        for eps, group in df.groupby("epsilon")
+    }
+    all_weights = sorted(df['weight'].unique())
+    if not all_weights:
+        return
+
+    plt.figure(figsize=(12, 5))
+
+    for (eps, data), (color, ls, marker) in zip(result.items(), style_cycler()):
+        y = [data.get(w, None) for w in all_weights]
+        plt.plot([f'{w:g}' for w in all_weights], y, label=f"ε={eps}", color=color,
+                 linestyle=ls, marker=marker, markersize=14, linewidth=4)
+
+    plt.xlabel('Suboptimality Bound', fontsize=26, fontweight='bold')
+    plt.margins(x=0.003)
+    plt.yscale('log')
+    plt.xticks(fontsize=22, fontweight='bold')
+    plt.yticks(fontsize=22, fontweight='bold')
+    plt.ylabel(TABLE_COLUMNS[column], fontsize=26, fontweight='bold')
+    if legend:
+        plt.legend(frameon=True, ncol=2, prop={'size': 22, 'weight': 'bold'})
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(f'results/figures/{name}.pdf')
+    plt.close()
+
+
+def main():
+    # python3 analysis/memory_analysis.py [stp|wstp|toh]
+    domain = sys.argv[1] if len(sys.argv) > 1 else 'stp'
+    print("Loading data")
+    summary_df = load_summary(domain)
+    if 'memory' not in summary_df.columns:
+        print(f"No search telemetry in the {domain} logs, rerun the sweep with the current drivers")
+        return
+    summary = ResultSet(summary_df)
+    print("Generating LaTex tabular code")
+    Path("results/latex").mkdir(parents=True, exist_ok=True)
+    gen_memory_table_latex(summary, domain)
+    print("Generating figures")
+    Path("results/figures").mkdir(parents=True, exist_ok=True)
+    generate_memory_figures(summary, domain, 'wa', 'memory')
+    generate_memory_figures(summary, domain, 'wa', 'peak-open', legend=False)
+    generate_memory_figures(summary, domain, 'ios', 'memory', legend=False)
+    generate_memory_figures(summary, domain, 'ios', 'peak-open', legend=False)
+
+
+if __name__ == '__main__':
+    main()
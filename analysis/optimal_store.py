@@ -0,0 +1,107 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+STORE_NAME = 'optimal_costs.json'
+STORE_VERSION = 1
+DEFAULT_GOAL = 'default'  # All the drivers search for the default goal state of their environment
+
+
+# The store keeps the verified optimal solution cost (C*) of every (domain, goal, instance), so sweeps that only need
+# heuristic or quality data can skip the optimal (weight 1) searches. Its layout is
+# {"version": 1, "revision": n, "costs": {domain: {goal: {id: {"cost": c, "source": s}}}}}, and the revision is bumped
+# on every save that changes it. The store is kept next to the domain data directories it is verified against (e.g.,
+# data/optimal_costs.json for data/stp), so the results of every sweep (including those of a work queue, in
+# <queue>/data/<domain>) are analyzed with the costs of the optimal searches they skipped.
+
+
+def store_file(data_dir):
+    return Path(data_dir).parent / STORE_NAME
+
+
+def load_store(store_file):
+    store_file = Path(store_file)
+    if not store_file.exists():
+        return {'version': STORE_VERSION, 'revision': 0, 'costs': {}}
+    with open(store_file, 'r') as f:
+        store = json.load(f)
+    if store.get('version') != STORE_VERSION:
+        raise ValueError(f"Unsupported optimal cost store version {store.get('version')} in {store_file}")
+    return store
+
+
+def save_store(store, store_file):
+    # Written to a temporary file first, so readers never see a partially written store
+    store_file = Path(store_file)
+    store_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = store_file.with_name(f'{store_file.name}.{os.getpid()}.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(store, f, indent=1, sort_keys=True)
+    os.replace(tmp_file, store_file)
+
+
+def get_costs(store, domain, goal=DEFAULT_GOAL):
+    entries = store['costs'].get(domain, {}).get(goal, {})
+    return {int(id_value): entry['cost'] for id_value, entry in entries.items()}
+
+
+def add_costs(store, domain, solutions, source, goal=DEFAULT_GOAL):
+    # Adds the optimal costs of the instances, failing (like get_optimal_solutions) when they disagree with the store.
+    # Returns whether the store changed.
+    entries = store['costs'].setdefault(domain, {}).setdefault(goal, {})
+    changed = False
+    for id_value, cost in solutions.items():
+        entry = entries.get(str(id_value))
+        if entry is None:
+            entries[str(id_value)] = {'cost': float(cost), 'source': source}
+            changed = True
+        elif entry['cost'] != float(cost):
+            raise ValueError(f"Inconsistent solutions found for id: {id_value} ({cost} in {source}, "
+                             f"{entry['cost']} in {entry['source']})")
+    return changed
+
+
+def sync_optimal_costs(domain, solutions, source, store_file, goal=DEFAULT_GOAL):
+    # Verifies the optimal costs found in the results against the store, records the new ones, and returns all the
+    # known optimal costs of the domain (including those of instances whose optimal searches were skipped)
+    store = load_store(store_file)
+    if add_costs(store, domain, solutions, source, goal):
+        store['revision'] += 1
+        save_store(store, store_file)
+    return get_costs(store, domain, goal)
+
+
+def missing_instances(domain, instances, store_file, goal=DEFAULT_GOAL):
+    known = get_costs(load_store(store_file), domain, goal)
+    return [i for i in instances if i not in known]
+
+
+def import_costs(domain, from_file, to_file, goal=DEFAULT_GOAL):
+    # Copies (and verifies) the optimal costs of a domain into another store, e.g., into the store next to the data
+    # directory of a sweep that skips its optimal searches thanks to them
+    if Path(from_file).resolve() != Path(to_file).resolve():
+        sync_optimal_costs(domain, get_costs(load_store(from_file), domain, goal), str(from_file), to_file, goal)
+
+
+def require_costs(solutions, ids):
+    # Fails when some instances have no known optimal cost, e.g., results of a sweep that skipped its optimal searches
+    # analyzed with another store
+    missing = sorted({int(i) for i in ids} - set(solutions))
+    if missing:
+        raise ValueError(f"No optimal cost is known for instances {missing}: run their optimal (weight 1) searches, or "
+                         f"keep the {STORE_NAME} of the sweep that skipped them next to its data directory")
+
+
+def main():
+    # Prints the known optimal costs of a domain: optimal_store.py <domain> [data dir, data/<domain> by default]
+    domain = sys.argv[1] if len(sys.argv) > 1 else 'stp'
+    store = load_store(store_file(sys.argv[2] if len(sys.argv) > 2 else f'data/{domain}'))
+    costs = get_costs(store, domain)
+    print(f"Revision {store['revision']}: {len(costs)} optimal costs of {domain}")
+    for id_value, cost in sorted(costs.items()):
+        print(f'{id_value}: {cost:g}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from aggregation import CONFIG_COLUMNS
+
+HEURISTIC_COLUMNS = ['heuristic-optimal', 'heuristic-greedy']
+
+
+# A ResultSet is an indexed view of a results (or summary, or init heuristic) frame. The frame is sorted once by the
+# key columns, so the rows of every key combination (e.g., a configuration) are one contiguous block, and a hash index
+# maps each combination to its block. Filters compose lazily with where() and run on frame(): conditions on the keys
+# only look at the index (one entry per combination, not per row), and a selection of contiguous blocks is returned
+# as a slice of the sorted frame without copying it. Conditions on other columns are applied as usual masks, but only
+# to the rows selected by the keys.
+
+
+class ResultSet:
+    def __init__(self, df, keys=CONFIG_COLUMNS, order=('id',)):
+        self.keys = [key for key in keys if key in df.columns]
+        order = [column for column in order if column in df.columns and column not in self.keys]
+        self.df = df.sort_values(self.keys + order, kind='stable', ignore_index=True)
+        indices = self.df.groupby(self.keys, sort=False, dropna=False).indices
+        self.blocks = {(key if isinstance(key, tuple) else (key,)): (positions[0], positions[-1] + 1)
+                       for key, positions in indices.items()}
+        self.index = pd.DataFrame(list(self.blocks.keys()), columns=self.keys)
+        self.index['start'], self.index['stop'] = zip(*self.blocks.values()) if self.blocks else ([], [])
+        self.index = self.index.sort_values('start', ignore_index=True)
+        self.conditions = []
+
+    def where(self, conditions=None, **kwargs):
+        # Conditions are {column: value or list of values}, keyword names use '_' for the '-' of the column names
+        # (e.g., where(alg='wa', heuristic_optimal='ridge')). Nothing is evaluated until the results are needed.
+        conditions = {**(conditions or {}), **{key.replace('_', '-'): value for key, value in kwargs.items()}}
+        result = object.__new__(ResultSet)
+        result.__dict__.update(self.__dict__)
+        result.conditions = self.conditions + list(conditions.items())
+        return result
+
+    def slices(self):
+        key_conditions = [(column, value) for column, value in self.conditions if column in self.keys]
+        if (len(key_conditions) == len(self.keys) and len({column for column, _ in key_conditions}) == len(self.keys)
+                and not any(is_list(value) for _, value in key_conditions)):
+            # A single key combination, a hash lookup
+            values = dict(key_conditions)
+            block = self.blocks.get(tuple(values[key] for key in self.keys))
+            return [] if block is None else [block]
+        index = self.index
+        for column, value in key_conditions:
+            index = index[index[column].isin(value) if is_list(value) else index[column] == value]
+        # Merge adjacent blocks, so selections of leading key columns are a single slice
+        slices = []
+        for start, stop in zip(index['start'], index['stop']):
+            if slices and slices[-1][1] == start:
+                slices[-1] = (slices[-1][0], stop)
+            else:
+                slices.append((start, stop))
+        return slices
+
+    def frame(self):
+        slices = self.slices()
+        if len(slices) == 1:
+            df = self.df.iloc[slices[0][0]:slices[0][1]]
+        elif slices:
+            df = self.df.iloc[np.concatenate([np.arange(start, stop) for start, stop in slices])]
+        else:
+            df = self.df.iloc[0:0]
+        for column, value in self.conditions:
+            if column not in self.keys:
+                df = df[df[column].isin(value) if is_list(value) else df[column] == value]
+        return df
+
+    def __len__(self):
+        return len(self.frame())
+
+
+def is_list(value):
+    return isinstance(value, (list, tuple, set, np.ndarray, pd.Series))
@@ -0,0 +1,27 @@
+import functools
+import re
+from pathlib import Path
+
+import numpy as np
+
+KORF_INSTANCES_SOURCE = Path(__file__).resolve().parent.parent / 'src' / 'envutil' / 'STPInstances.cpp'
+
+# Optimal (unit cost) solution lengths of the Korf instances
+DISTANCES = [57, 55, 59, 56, 56, 52, 52, 50, 46, 59, 57, 45, 46, 59, 62, 42, 66, 55, 46, 52, 54, 59, 49, 54, 52, 58,
+             53, 52, 54, 47, 50, 59, 60, 52, 55, 52, 58, 53, 49, 54, 54, 42, 64, 50, 51, 49, 47, 49, 59, 53, 56, 56,
+             64, 56, 41, 55, 50, 51, 57, 66, 45, 57, 56, 51, 47, 61, 50, 51, 53, 52, 44, 56, 49, 56, 48, 57, 54, 53,
+             42, 57, 53, 62, 49, 55, 44, 45, 52, 65, 54, 50, 57, 57, 46, 53, 50, 49, 44, 54, 57, 54]
+
+
+@functools.lru_cache()
+def korf_instances(source=KORF_INSTANCES_SOURCE):
+    # The instances of STP::GetKorfInstance, read from its C++ source, as a (100, 16) uint8 array where
+    # instances[i, location] = tile
+    with open(source, 'r') as f:
+        code = f.read()
+    body = code[code.index('GetKorfInstance'):]
+    body = body[body.index('{{'):body.index('}};')]
+    instances = np.array([row.split(',') for row in re.findall(r'\{([\d,\s]+)', body)], dtype=np.uint8)
+    if instances.shape != (len(DISTANCES), 16):
+        raise ValueError(f"Cannot read the Korf instances from {source}")
+    return instances
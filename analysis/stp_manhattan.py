@@ -0,0 +1,124 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from optimal_store import get_costs, load_store, store_file
+from stp_instances import DISTANCES, korf_instances
+from stp_pdb import parse_instance, print_heuristic_stats, print_sample_stats, read_init_heuristics
+
+WIDTH = 4
+STP_SIZE = WIDTH * WIDTH
+BATCH_SIZE = 1 << 20
+WALK_LENGTH = 1000
+
+# Same tile weights as the MNPuzzle puzzleWeight enum (kHeavy is used for wmd in src/paper/WeightedStpDriver.cpp)
+TILE_WEIGHTS = {
+    'unit': lambda tiles: np.ones_like(tiles),
+    'unit-plus-frac': lambda tiles: 1 + 1 / (1 + tiles),
+    'heavy': lambda tiles: tiles,
+    'squared': lambda tiles: tiles ** 2,
+    'square-root': lambda tiles: np.sqrt(tiles),
+    'square-plus-one-root': lambda tiles: np.sqrt(tiles ** 2 + 1),
+}
+HEURISTIC_WEIGHTS = {'md': 'unit', 'wmd': 'heavy'}
+
+LOCATIONS = np.arange(STP_SIZE)
+
+
+def blank_neighbors(location):
+    x, y = location % WIDTH, location // WIDTH
+    moves = [(x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)]
+    return [nx + ny * WIDTH for nx, ny in moves if 0 <= nx < WIDTH and 0 <= ny < WIDTH]
+
+
+# The legal blank moves of every location, padded with -1
+NEIGHBORS = np.array([blank_neighbors(x) + [-1] * (4 - len(blank_neighbors(x))) for x in range(STP_SIZE)])
+NUM_NEIGHBORS = (NEIGHBORS >= 0).sum(axis=1)
+
+
+def distance_table(weight='unit'):
+    # table[tile, location] is the weighted Manhattan distance of the tile at the location from its goal location.
+    # The goal is the default MNPuzzleState (tile x at location x), and the blank is not counted.
+    tiles = LOCATIONS.astype(np.float64)
+    distances = (np.abs(LOCATIONS[:, None] // WIDTH - LOCATIONS[None, :] // WIDTH) +
+                 np.abs(LOCATIONS[:, None] % WIDTH - LOCATIONS[None, :] % WIDTH))
+    table = TILE_WEIGHTS[weight](tiles)[:, None] * distances
+    table[0] = 0
+    return table
+
+
+def manhattan_distance(states, weight='unit'):
+    # Vectorized MNPuzzle::HCost, states is an (n, 16) uint8 array where states[i, location] = tile
+    states = np.asarray(states, dtype=np.uint8)
+    flat_table = distance_table(weight).ravel()
+    h = np.empty(len(states), dtype=np.float64)
+    for start in range(0, len(states), BATCH_SIZE):
+        batch = states[start:start + BATCH_SIZE].astype(np.intp)
+        h[start:start + BATCH_SIZE] = flat_table[batch * STP_SIZE + LOCATIONS].sum(axis=1)
+    return h
+
+
+def heuristic_values(states, heuristic):
+    return manhattan_distance(states, HEURISTIC_WEIGHTS[heuristic])
+
+
+def random_walk_states(n, length=WALK_LENGTH, seed=0):
+    # n random walks of the blank from the goal, all advanced together one move at a time
+    rng = np.random.default_rng(seed)
+    states = np.tile(LOCATIONS.astype(np.uint8), (n, 1))
+    blank = np.zeros(n, dtype=np.intp)
+    rows = np.arange(n)
+    for _ in range(length):
+        moves = (rng.random(n) * NUM_NEIGHBORS[blank]).astype(np.intp)
+        target = NEIGHBORS[blank, moves]
+        states[rows, blank] = states[rows, target]
+        states[rows, target] = 0
+        blank = target
+    return states
+
+
+def verify_korf_instances(init_file):
+    # Manhattan distance is admissible and has the parity of the optimal solution lengths (DISTANCES), and both
+    # heuristics must match the initial heuristic values of the solver when they are available
+    instances = korf_instances()
+    md = manhattan_distance(instances)
+    distances = np.array(DISTANCES)
+    if (md > distances).any() or ((distances - md) % 2 != 0).any():
+        raise ValueError("Manhattan distance is inconsistent with the optimal solution lengths.")
+    if init_file.exists():
+        init_df = read_init_heuristics(init_file)
+        states = np.stack([parse_instance(instance) for instance in init_df['instance']])
+        if not (states == instances[init_df['id'].astype(int)]).all():
+            raise ValueError("The instances of the solver do not match the Korf instances.")
+        for column, heuristic_column in [('init-ho', 'heuristic-optimal'), ('init-hg', 'heuristic-greedy')]:
+            h = heuristic_values(states, init_df[heuristic_column].iloc[0])
+            if not (h == init_df[column].astype(float)).all():
+                raise ValueError(f"{column} does not match the solver's heuristic values.")
+    return md
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    length = int(sys.argv[2]) if len(sys.argv) > 2 else WALK_LENGTH
+    ho, hg = 'wmd', 'md'
+    data_dir = Path('data/wstp')
+    print("Verifying the Korf instances")
+    md = verify_korf_instances(data_dir / 'wstp_heu_init.out')
+    print(f"Mean Manhattan distance: {md.mean():.2f}, mean optimal solution length: {np.mean(DISTANCES):.2f}")
+    # The weighted optimal costs are only known from the optimal (weight 1) searches of the WSTP sweep
+    costs = get_costs(load_store(store_file(data_dir)), 'wstp')
+    if costs:
+        ids = sorted(costs)
+        print(f"h/C* and GDRC over the {len(ids)} Korf instances with known optimal costs")
+        instances = korf_instances()[ids]
+        print_heuristic_stats(ho, hg, heuristic_values(instances, ho), heuristic_values(instances, hg),
+                              np.array([costs[i] for i in ids]), np.array(DISTANCES)[ids])
+    else:
+        print(f"No optimal WSTP costs in {store_file(data_dir)}, run the WSTP sweep (or analysis) first")
+    print(f"Evaluating {samples:,} random walk states of length {length}")
+    states = random_walk_states(samples, length)
+    print_sample_stats(ho, hg, heuristic_values(states, ho), heuristic_values(states, hg))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.stats import kendalltau
+
+from aggregation import open_log
+from stp_instances import DISTANCES, korf_instances
+
+STP_SIZE = 16
+STATE_BYTES = 68  # sizeof(MNPuzzleState<4, 4>), an unsigned blank location followed by 16 ints
+BATCH_SIZE = 1 << 20
+EPSILONS = [1, 0.99, 0.9, 0.75, 0.5, 0.25, 0.1, 0.01, 0]
+
+# Same patterns as in src/paper/StpDriver.cpp
+PATTERNS = {
+    'vertical': [[0, 1, 4, 5, 8, 9, 12, 13], [0, 2, 3, 6, 7, 10, 11, 14, 15]],
+    'ridge': [[0, 1, 2, 4, 5, 6, 8, 9], [0, 3, 7, 10, 11, 12, 13, 14, 15]],
+    'test': [[0, 1, 4, 5, 8], [0, 2, 3, 6, 7]],
+}
+
+
+def load_pdb(file_path: Path):
+    # Memory-maps a PDB saved by LexPermutationPDB::Save (8 bits per entry), which writes, in order, the lookup type,
+    # the goal state, the NBitArray (entries, 64-bit words, words), the puzzle size, the PDB size, an example state, and
+    # the distinct (pattern) tiles. Returns the pattern tiles and the PDB values.
+    with open(file_path, 'rb') as f:
+        lookup_type = int(np.frombuffer(f.read(4), dtype='<i4')[0])
+        if lookup_type != 0:
+            raise ValueError(f"Only uncompressed PDBs are supported: {file_path}")
+        f.seek(STATE_BYTES, 1)
+        entries, words = np.frombuffer(f.read(16), dtype='<u8')
+        values_offset = f.tell()
+        f.seek(int(words) * 8, 1)
+        _, pdb_size = np.frombuffer(f.read(16), dtype='<u8')
+        f.seek(STATE_BYTES, 1)
+        distinct_size = int(np.frombuffer(f.read(8), dtype='<u8')[0])
+        distinct = np.frombuffer(f.read(4 * distinct_size), dtype='<i4').astype(np.int64)
+    if entries != pdb_size or int(words) * 8 < entries:
+        raise ValueError(f"Corrupted PDB file: {file_path}")
+    values = np.memmap(file_path, dtype=np.uint8, mode='r', offset=values_offset, shape=(int(entries),))
+    return distinct, values
+
+
+def find_pdb_file(pdb_dir, heuristic, pid):
+    # The driver names PDBs stp_<heuristic>_<goal hash>_<pid>.lex, the goal hash is std::hash of the goal state, which
+    # cannot be computed here, so the PDBs of only one goal can be kept in the directory
+    files = sorted(Path(pdb_dir).glob(f'stp_{heuristic}_*_{pid}.lex'))
+    if not files:
+        raise FileNotFoundError(f"No PDB for {heuristic} ({pid}) in {pdb_dir}, run balance with -p {pdb_dir} first")
+    if len(files) > 1:
+        raise ValueError(f"PDBs of several goals for {heuristic} ({pid}) in {pdb_dir}: "
+                         f"{', '.join(file.name for file in files)}")
+    return files[0]
+
+
+def rank_states(states, distinct):
+    # Vectorized LexPermutationPDB::GetPDBHash, states is an (n, 16) array where states[i, location] = tile
+    states = np.asarray(states)
+    locations = np.argsort(states, axis=1, kind='stable')[:, distinct].astype(np.int64)
+    ranks = np.zeros(len(states), dtype=np.int64)
+    entries_left = STP_SIZE
+    for x in range(len(distinct)):
+        # FactorialUpperK(entries_left - 1, STP_SIZE - len(distinct))
+        multiplier = int(np.prod(np.arange(STP_SIZE - len(distinct) + 1, entries_left, dtype=np.int64)))
+        ranks += locations[:, x] * multiplier
+        entries_left -= 1
+        locations[:, x + 1:] -= locations[:, x + 1:] > locations[:, x:x + 1]
+    return ranks
+
+
+def load_heuristic(heuristic, pdb_dir):
+    # Same heuristic names as getHeuristic in src/paper/StpDriver.cpp: a pattern name is the additive heuristic of
+    # both its PDBs, and a trailing 0/1 selects only one of them
+    if heuristic == 'zero':
+        return []
+    if heuristic[-1] in '01':
+        return [load_pdb(find_pdb_file(pdb_dir, heuristic[:-1], int(heuristic[-1])))]
+    return [load_pdb(find_pdb_file(pdb_dir, heuristic, pid)) for pid in range(len(PATTERNS[heuristic]))]
+
+
+def heuristic_values(states, pdbs):
+    states = np.asarray(states)
+    h = np.zeros(len(states), dtype=np.float64)
+    for start in range(0, len(states), BATCH_SIZE):
+        batch = states[start:start + BATCH_SIZE]
+        for distinct, values in pdbs:
+            h[start:start + BATCH_SIZE] += values[rank_states(batch, distinct)]
+    return h
+
+
+def permutation_parity(states):
+    states = np.asarray(states)
+    inversions = np.zeros(len(states), dtype=np.int64)
+    for i in range(STP_SIZE - 1):
+        inversions += (states[:, i:i + 1] > states[:, i + 1:]).sum(axis=1)
+    return inversions % 2
+
+
+def random_states(n, seed=0):
+    # Uniformly random solvable states. A state is solvable iff the parity of the permutation (blank included) equals
+    # the parity of the Manhattan distance of the blank from its goal location (location 0)
+    rng = np.random.default_rng(seed)
+    states = np.argsort(rng.random((n, STP_SIZE)), axis=1).astype(np.uint8)
+    blank = np.argmax(states == 0, axis=1)
+    unsolvable = permutation_parity(states) != (blank // 4 + blank % 4) % 2
+    # Fix unsolvable states by swapping the first two tiles that are not the blank
+    first = np.where(blank == 0, 1, 0)
+    second = np.where(blank <= 1, 2, 1)
+    rows = np.nonzero(unsolvable)[0]
+    states[rows, first[rows]], states[rows, second[rows]] = states[rows, second[rows]], states[rows, first[rows]]
+    return states
+
+
+def parse_instance(instance):
+    # Parses the instance printed in the [I] lines, e.g., "(4x4)14 13 15 7 11 12 9 5 6 0 2 1 4 8 10 3"
+    return np.array(instance.split(')')[-1].split(), dtype=np.uint8)
+
+
+def heuristic_stats(h_optimal, h_greedy, epsilon, costs, distances=None):
+    # h/C* and GDRC (Kendall tau) of the epsilon blend, as in the analysis tables. The GDRC ranks the unit cost
+    # distances when they are given (as in the WSTP tables), the costs otherwise.
+    h = epsilon * h_optimal + (1 - epsilon) * h_greedy
+    tau, _ = kendalltau(costs if distances is None else distances, h)
+    return np.mean(h / costs), tau
+
+
+def print_heuristic_stats(ho, hg, h_optimal, h_greedy, costs, distances=None):
+    for epsilon in EPSILONS:
+        hdiff, tau = heuristic_stats(h_optimal, h_greedy, epsilon, costs, distances)
+        print(f'{ho} & {hg} & {epsilon} & {hdiff:.3f} & {tau:.3f}\\\\')
+
+
+def print_sample_stats(ho, hg, h_optimal, h_greedy):
+    # C* is unknown for random states, so the blends are compared to the optimal heuristic instead: the columns are
+    # h/h_o and the rank correlation with h_o (both 1 at epsilon 1 by definition)
+    print(f"Relative to {ho} (h/h_o and rank correlation with h_o) over the random states")
+    print_heuristic_stats(ho, hg, h_optimal, h_greedy, np.maximum(h_optimal, 1))
+
+
+def read_init_heuristics(file_path):
+    rows = []
+    with open_log(Path(file_path)) as f:
+        current = {}
+        for line in f:
+            if line.startswith('[D]') or line.startswith('[I]') or line.startswith('[R]'):
+                current.update(dict(item.split(": ") for item in line[3:].strip().split("; ")))
+                if line.startswith('[R]'):
+                    rows.append(current.copy())
+    return pd.DataFrame(rows)
+
+
+def main():
+    pdb_dir = sys.argv[1] if len(sys.argv) > 1 else 'pdbs'
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+    init_file = Path('data/stp/stp_heu_init.out')
+    ho, hg = 'ridge', 'ridge1'
+    if init_file.exists():
+        init_df = read_init_heuristics(init_file)
+        ho, hg = init_df['heuristic-optimal'].iloc[0], init_df['heuristic-greedy'].iloc[0]
+    print(f"Loading {ho} and {hg} PDBs from {pdb_dir}")
+    optimal_pdbs, greedy_pdbs = load_heuristic(ho, pdb_dir), load_heuristic(hg, pdb_dir)
+    if init_file.exists():
+        print("Verifying PDB lookups against the initial heuristic values of the solver")
+        states = np.stack([parse_instance(instance) for instance in init_df['instance']])
+        if not ((heuristic_values(states, optimal_pdbs) == init_df['init-ho'].astype(float)).all() and
+                (heuristic_values(states, greedy_pdbs) == init_df['init-hg'].astype(float)).all()):
+            raise ValueError("PDB lookups do not match the solver's heuristic values.")
+    print("h/C* and GDRC over the Korf instances")
+    instances = korf_instances()
+    print_heuristic_stats(ho, hg, heuristic_values(instances, optimal_pdbs), heuristic_values(instances, greedy_pdbs),
+                          np.array(DISTANCES, dtype=np.float64))
+    print(f"Evaluating {samples:,} random states")
+    states = random_states(samples)
+    print_sample_stats(ho, hg, heuristic_values(states, optimal_pdbs), heuristic_values(states, greedy_pdbs))
+
+if __name__ == '__main__':
+    main()
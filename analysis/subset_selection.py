@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+from scipy.stats import kendalltau
+
+from aggregation import CONFIG_COLUMNS
+from instance_ranges import format_instance_args
+from optimal_store import store_file, sync_optimal_costs
+
+RANDOM_BASELINE_SAMPLES = 100
+
+
+def load_results(domain):
+    # Past sweep results with solution quality, using the same loading and verification as the domain's analysis
+    if domain == 'wstp':
+        import wstp_analysis
+        result_df, _ = wstp_analysis.parse_dir('data/wstp')
+        solutions = sync_optimal_costs('wstp', dict(enumerate(wstp_analysis.SOLUTIONS)), 'SOLUTIONS',
+                                       store_file('data/wstp'))
+        return wstp_analysis.add_solution_quality(result_df, solutions)
+    if domain == 'stp':
+        import stp_analysis as analysis
+    elif domain == 'toh':
+        import toh_analysis as analysis
+    else:
+        raise ValueError(f"Unknown domain: {domain}")
+    result_df, _ = analysis.parse_dir(f'data/{domain}')
+    solutions = sync_optimal_costs(domain, analysis.get_optimal_solutions(result_df), f'data/{domain}',
+                                   store_file(f'data/{domain}'))
+    return analysis.add_solution_quality(result_df, solutions)
+
+
+def config_matrices(result_df):
+    # Configuration x instance matrices of expanded, quality and time, only for configurations that ran all instances
+    instances = np.sort(result_df['id'].unique())
+    matrices = {column: result_df.pivot_table(index=CONFIG_COLUMNS, columns='id', values=column, aggfunc='mean')
+                .reindex(columns=instances)
+                for column in ['expanded', 'quality', 'time']}
+    complete = matrices['expanded'].notna().all(axis=1)
+    return instances, {column: matrix[complete].to_numpy(dtype=float) for column, matrix in matrices.items()}
+
+
+def rank_agreement(matrices, subset):
+    # Kendall's tau between the full-set and subset per-configuration means of expanded and quality
+    taus = []
+    for column in ['expanded', 'quality']:
+        tau, _ = kendalltau(matrices[column].mean(axis=1), matrices[column][:, subset].mean(axis=1))
+        taus.append(1.0 if np.isnan(tau) else tau)  # nan only happens when all means are tied
+    return taus
+
+
+def select_subset(matrices, size):
+    # Greedy forward selection of the instance that most improves the mean rank agreement, followed by swap passes
+    # until no single swap of a chosen instance with an unchosen one improves it any further
+    n = matrices['expanded'].shape[1]
+    subset = []
+    for _ in range(size):
+        candidates = [i for i in range(n) if i not in subset]
+        subset.append(max(candidates, key=lambda i: np.mean(rank_agreement(matrices, subset + [i]))))
+    best = np.mean(rank_agreement(matrices, subset))
+    improved = True
+    while improved:
+        improved = False
+        for position in range(size):
+            for candidate in range(n):
+                if candidate in subset:
+                    continue
+                trial = subset[:position] + [candidate] + subset[position + 1:]
+                score = np.mean(rank_agreement(matrices, trial))
+                if score > best:
+                    subset, best, improved = trial, score, True
+    return sorted(subset)
+
+
+def random_baseline(matrices, size, seed=0):
+    rng = np.random.default_rng(seed)
+    n = matrices['expanded'].shape[1]
+    taus = [rank_agreement(matrices, list(rng.choice(n, size, replace=False))) for _ in range(RANDOM_BASELINE_SAMPLES)]
+    return np.mean(taus, axis=0)
+
+
+def main():
+    domain = sys.argv[1] if len(sys.argv) > 1 else 'stp'
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    Path("results").mkdir(exist_ok=True)
+    print("Loading data")
+    result_df = load_results(domain)
+    instances, matrices = config_matrices(result_df)
+    print(f"Selecting {size} of {len(instances)} instances over {matrices['expanded'].shape[0]} complete configurations")
+    subset = select_subset(matrices, size)
+    tau_expanded, tau_quality = rank_agreement(matrices, subset)
+    random_expanded, random_quality = random_baseline(matrices, size)
+    savings = 1 - matrices['time'][:, subset].sum() / matrices['time'].sum()
+    instance_args = format_instance_args(instances[subset])
+    print(f"Kendall tau of mean expanded: {tau_expanded:.3f} (random subsets: {random_expanded:.3f})")
+    print(f"Kendall tau of mean quality: {tau_quality:.3f} (random subsets: {random_quality:.3f})")
+    print(f"Predicted sweep time savings: {savings:.1%}")
+    print(f"-i {instance_args}")
+    with open(f'results/{domain}_subset.txt', 'w+') as f:
+        f.write(instance_args + '\n')
+
+
+if __name__ == '__main__':
+    main()
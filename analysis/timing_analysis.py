@@ -0,0 +1,132 @@
+import sys
+from os import PathLike
+from pathlib import Path
+
+import pandas as pd
+from pandas import DataFrame
+
+from aggregation import CONFIG_COLUMNS, iter_log_files, open_log
+
+TIMING_COLUMNS = ['domain'] + CONFIG_COLUMNS
+MAD_SCALE = 1.4826  # The MAD of normal noise times MAD_SCALE is its standard deviation
+OUTLIER_THRESHOLD = 3
+
+
+def parse_timing_file(file_path: Path):
+    # The [R] results and [T] time samples (printed with -r) of a log, tagged with the file as an instance can be
+    # logged by several files (e.g., work queue shards)
+    current_dict = {'file': str(file_path)}
+    results = []
+    samples = []
+    with open_log(file_path) as f:
+        for line in f:
+            if line.startswith('[D]') or line.startswith('[I]') or line.startswith('[R]'):
+                current_dict.update(dict(item.split(": ") for item in line[3:].strip().split("; ")))
+                if line.startswith('[R]'):
+                    results.append(current_dict.copy())
+            elif line.startswith('[T]'):
+                sample = current_dict.copy()
+                sample.update(dict(item.split(": ") for item in line[3:].strip().split("; ")))
+                samples.append(sample)
+    return DataFrame(results), DataFrame(samples)
+
+
+def parse_timing_dir(dir_path: str | PathLike[str]):
+    dir_path = Path(dir_path)
+    parsed = [parse_timing_file(file_path) for file_path in iter_log_files(dir_path)]
+    results = [results for results, _ in parsed if not results.empty and 'init-ho' not in results.columns]
+    samples = [samples for _, samples in parsed if not samples.empty]
+    if not results:
+        return None
+    return generate_samples_df(pd.concat(results, ignore_index=True),
+                               pd.concat(samples, ignore_index=True) if samples else DataFrame())
+
+
+def generate_samples_df(results_df, samples_df):
+    # One row per time sample, runs without [T] lines have their [R] time as their only sample. An instance rerun
+    # within a file (e.g., a resumed batch) keeps its last [R] row.
+    keys = TIMING_COLUMNS + ['id', 'file']
+    results_df = results_df[keys + ['expanded', 'time']].drop_duplicates(keys, keep='last')
+    results_df['sample'] = 0
+    if not samples_df.empty:
+        samples_df = samples_df[keys + ['sample', 'time']]
+        repeated = results_df.set_index(keys).index.isin(samples_df.set_index(keys).index)
+        samples_df = samples_df.merge(results_df[keys + ['expanded']], on=keys, how='left')
+        results_df = pd.concat([results_df[~repeated], samples_df], ignore_index=True)
+    df = results_df
+    df['time'] = df['time'].apply(lambda x: x[:-1] if str(x).endswith('s') else x)  # Remove unit from time
+    df['id'] = df['id'].astype(int)
+    df['sample'] = df['sample'].astype(int)
+    df['expanded'] = df['expanded'].astype(int)
+    df['weight'] = df['weight'].astype(float)
+    df['epsilon'] = df['epsilon'].astype(float)
+    df['time'] = df['time'].astype(float)
+    return df
+
+
+def instance_timing_stats(df):
+    # Samples further than OUTLIER_THRESHOLD scaled MADs from the median are left out of the filtered mean
+    keys = TIMING_COLUMNS + ['id']
+    df = df.copy()
+    grouped = df.groupby(keys)['time']
+    df['median'] = grouped.transform('median')
+    df['deviation'] = (df['time'] - df['median']).abs()
+    df['mad'] = df.groupby(keys)['deviation'].transform('median')
+    df['inlier'] = (df['mad'] == 0) | (df['deviation'] <= OUTLIER_THRESHOLD * MAD_SCALE * df['mad'])
+    stats = df.groupby(keys).agg(expanded=('expanded', 'first'),
+                                 samples=('time', 'count'),
+                                 time_median=('median', 'first'),
+                                 time_mad=('mad', 'first'),
+                                 time_min=('time', 'min'),
+                                 time_max=('time', 'max'),
+                                 outliers=('inlier', lambda x: int((~x).sum())))
+    stats['time_filtered_mean'] = df[df['inlier']].groupby(keys)['time'].mean()
+    stats['nodes_per_second'] = stats['expanded'] / stats['time_median']
+    return stats.reset_index()
+
+
+def cell_timing_stats(instance_df):
+    # The throughput of a cell is its total expansions over its total median time
+    cells = instance_df.groupby(TIMING_COLUMNS).agg(instances=('id', 'count'),
+                                                    samples=('samples', 'sum'),
+                                                    outliers=('outliers', 'sum'),
+                                                    expanded=('expanded', 'sum'),
+                                                    time_median=('time_median', 'mean'),
+                                                    time_mad=('time_mad', 'mean'),
+                                                    time_filtered_mean=('time_filtered_mean', 'mean'),
+                                                    total_time=('time_median', 'sum'))
+    cells['relative_mad'] = cells['time_mad'] / cells['time_median']
+    cells['nodes_per_second'] = cells['expanded'] / cells['total_time']
+    cells['expanded'] = cells['expanded'] / cells['instances']
+    cells.drop(columns=['total_time'], inplace=True)
+    return cells.reset_index()
+
+
+def write_to_excel(instance_df, cell_df, filename):
+    with pd.ExcelWriter(filename) as writer:
+        cell_df.to_excel(writer, sheet_name="cells", index=False)
+        instance_df.to_excel(writer, sheet_name="instances", index=False)
+
+
+def main():
+    data_dirs = sys.argv[1:] if len(sys.argv) > 1 else [r"data/toh", r"data/stp", r"data/wstp"]
+    Path("results").mkdir(exist_ok=True)
+    for data_dir in data_dirs:
+        if not Path(data_dir).is_dir():
+            print(f"Skipping {data_dir}, no such directory")
+            continue
+        print(f"Loading timing data from {data_dir}")
+        samples_df = parse_timing_dir(data_dir)
+        if samples_df is None:
+            print(f"Skipping {data_dir}, no results found")
+            continue
+        print("Computing robust time statistics")
+        instance_df = instance_timing_stats(samples_df)
+        cell_df = cell_timing_stats(instance_df)
+        print(f"{int(cell_df['outliers'].sum())} outlier samples out of {int(cell_df['samples'].sum())}")
+        print("Generating Excel")
+        write_to_excel(instance_df, cell_df, f"results/{Path(data_dir).name}_timing.xlsx")
+
+
+if __name__ == '__main__':
+    main()
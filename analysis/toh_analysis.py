@@ -1,7 +1,6 @@
-import itertools
 import math
+import sys
 from ctypes import Union
-from decimal import Decimal, ROUND_HALF_UP
 from os import PathLike
 from pathlib import Path
 
@@ -10,16 +9,17 @@ from matplotlib import pyplot as plt
 from pandas import DataFrame
 from scipy.stats import kendalltau
 
-
-def round_half_up(value, decimals):
-    d = Decimal(value)
-    return d.quantize(Decimal('1e-{0}'.format(decimals)), rounding=ROUND_HALF_UP)
+from aggregation import (MEMORY_VALUES, iter_chunks, iter_log_files, open_log, stream_logs, stream_optimal_solutions,
+                         summarize_results, summary_pivot, weighted_mean)
+from formatting import round_half_up, style_cycler
+from optimal_store import get_costs, load_store, missing_instances, require_costs, store_file, sync_optimal_costs
+from result_set import HEURISTIC_COLUMNS, ResultSet
 
 
 def parse_file(file_path: Path) -> DataFrame:
     current_dict = {}
     dicts = []
-    with open(file_path, 'r') as f:
+    with open_log(file_path) as f:
         for line in f:
             if line.startswith('[D]') or line.startswith('[I]') or line.startswith('[R]'):
                 current_dict.update(dict(item.split(": ") for item in line[3:].strip().split("; ")))
@@ -30,7 +30,7 @@ def parse_file(file_path: Path) -> DataFrame:
 
 def parse_dir(dir_path: str | PathLike[str]):
     dir_path = Path(dir_path)
-    dfs = [parse_file(file_path) for file_path in dir_path.rglob('*') if file_path.suffix in ['.out', '.txt', '.log']]
+    dfs = [parse_file(file_path) for file_path in iter_log_files(dir_path)]
     return (generate_results_df([df for df in dfs if 'init-ho' not in df.columns]),
             generate_init_heuristic_df([df for df in dfs if 'init-ho' in df.columns]))
 
@@ -54,6 +54,9 @@ def generate_results_df(dfs_list):
     df['weight'] = df['weight'].astype(float)
     df['epsilon'] = df['epsilon'].astype(float)
     df['time'] = df['time'].astype(float)
+    for column in MEMORY_VALUES:
+        if column in df.columns:  # Only in the logs of drivers that report search telemetry
+            df[column] = df[column].astype(float)
     return df
 
 
@@ -68,8 +71,8 @@ def get_optimal_solutions(df):
     return id_to_solution
 
 
-def verify_count(df, noexception=False):
-    group_counts = df.groupby(['heuristic-optimal', 'heuristic-greedy', 'epsilon', 'weight', 'alg']).size()
+def verify_count(summary_df, noexception=False):
+    group_counts = summary_df.set_index(['heuristic-optimal', 'heuristic-greedy', 'epsilon', 'weight', 'alg'])['count']
     invalid_combinations = group_counts[group_counts != 100]
     if not invalid_combinations.empty:
         if noexception:
@@ -81,6 +84,7 @@ def verify_count(df, noexception=False):
 
 
 def add_solution_quality(df, solutions):
+    require_costs(solutions, df['id'].unique())
     df['quality'] = df.apply(lambda row: row['solution'] / solutions[row['id']], axis=1)
     verify_quality(df)
     return df
@@ -96,18 +100,11 @@ def verify_heuristics(df, solutions):
         raise ValueError("Some heuristics are not admissible.")
 
 
-def gen_wa_table_latex(result_df, h_df, solution_list):
-    gbfs_df = result_df[(result_df['alg'] == 'gbfs')]
-    gbfs_pivot = gbfs_df.pivot_table(values=['expanded', 'quality'],
-                                     index=['heuristic-optimal', 'heuristic-greedy', 'epsilon'],
-                                     aggfunc='mean')
-    result_df = result_df[(result_df['alg'] == 'wa')]
-    pivot = result_df.pivot_table(
-        index=['heuristic-optimal', 'heuristic-greedy', 'epsilon'],
-        columns='weight',
-        values=['expanded', 'quality'],
-        aggfunc='mean'
-    )
+def gen_wa_table_latex(summary, h_set, solution_list):
+    gbfs_df = summary.where(alg='gbfs').frame()
+    gbfs_pivot = summary_pivot(gbfs_df, ['heuristic-optimal', 'heuristic-greedy', 'epsilon'])
+    summary_df = summary.where(alg='wa').frame()
+    pivot = summary_pivot(summary_df, ['heuristic-optimal', 'heuristic-greedy', 'epsilon'], 'weight')
     pivot = pivot.sort_index(level='epsilon', ascending=False).reset_index()
     pivot = pivot.sort_values(by=['heuristic-optimal', 'epsilon'], ascending=[True, False])
     latex_str = r"\begin{tabular}{ccccc" + ('r' * 2 * len(WEIGHTS)) + "rr}\n"
@@ -120,8 +117,7 @@ def gen_wa_table_latex(result_df, h_df, solution_list):
         ho = row[('heuristic-optimal', '')]
         hg = row[('heuristic-greedy', '')]
         epsilon = row[('epsilon', '')]
-        subset_df = h_df[(h_df["heuristic-optimal"] == ho) & (h_df["heuristic-greedy"] == hg)]
-        subset_df = subset_df.sort_values(by='id', ascending=True)
+        subset_df = h_set.where(heuristic_optimal=ho, heuristic_greedy=hg).frame()
         heuristic_values = epsilon * subset_df['init-ho'] + (1 - epsilon) * subset_df['init-hg']
         tau, _ = kendalltau(solution_list, heuristic_values)
         hdiff = sum([hv / sc for hv, sc in zip(heuristic_values, solution_list)]) / len(heuristic_values)
@@ -140,14 +136,9 @@ def gen_wa_table_latex(result_df, h_df, solution_list):
         f.write(latex_str)
 
 
-def gen_ios_table_latex(result_df, h_df, solution_list):
-    result_df = result_df[(result_df['alg'] == 'ios')]
-    pivot = result_df.pivot_table(
-        index=['heuristic-optimal', 'heuristic-greedy', 'epsilon'],
-        columns='weight',
-        values=['expanded', 'quality'],
-        aggfunc='mean'
-    )
+def gen_ios_table_latex(summary, h_set, solution_list):
+    summary_df = summary.where(alg='ios').frame()
+    pivot = summary_pivot(summary_df, ['heuristic-optimal', 'heuristic-greedy', 'epsilon'], 'weight')
     pivot = pivot.sort_index(level='epsilon', ascending=False).reset_index()
     pivot = pivot.sort_values(by=['heuristic-optimal', 'epsilon'], ascending=[True, False])
     latex_str = r"\begin{tabular}{ccccc" + ('r' * 2 * len(WEIGHTS[1:])) + "rr}\n"
@@ -167,8 +158,7 @@ def gen_ios_table_latex(result_df, h_df, solution_list):
         ho = row[('heuristic-optimal', '')]
         hg = row[('heuristic-greedy', '')]
         epsilon = row[('epsilon', '')]
-        subset_df = h_df[(h_df["heuristic-optimal"] == ho) & (h_df["heuristic-greedy"] == hg)]
-        subset_df = subset_df.sort_values(by='id', ascending=True)
+        subset_df = h_set.where(heuristic_optimal=ho, heuristic_greedy=hg).frame()
         heuristic_values = epsilon * subset_df['init-ho'] + (1 - epsilon) * subset_df['init-hg']
         tau, _ = kendalltau(solution_list, heuristic_values)
         hdiff = sum([hv / sc for hv, sc in zip(heuristic_values, solution_list)]) / len(heuristic_values)
@@ -183,33 +173,28 @@ def gen_ios_table_latex(result_df, h_df, solution_list):
     latex_str += '\\bottomrule\n\\end{tabular}'
 
 
-def write_to_excel(result_df, h_df, filename="results/toh.xlsx"):
+def write_to_excel(result_df, h_df, summary_df, filename="results/toh.xlsx"):
     with pd.ExcelWriter(filename) as writer:
-        result_df.to_excel(writer, sheet_name="results", index=False)
+        if result_df is not None:  # Per-run results are not kept in memory in chunked mode
+            result_df.to_excel(writer, sheet_name="results", index=False)
         h_df.to_excel(writer, sheet_name="heuristics", index=False)
+        summary_df.to_excel(writer, sheet_name="summary", index=False)
 
 
-def generate_ios_figure(df, heuristic, expanded=True, legend=True):
-    ios_df = df[(df["alg"] == 'ios') & (df["heuristic-optimal"] == heuristic)]
+def generate_ios_figure(summary, heuristic, expanded=True, legend=True):
+    ios_df = summary.where(alg='ios', heuristic_optimal=heuristic).frame()
     column = 'expanded' if expanded else 'quality'
     result = {
-        eps: group.groupby("weight").filter(lambda g: g["id"].count() == 100).groupby("weight")[column].mean().to_dict()
+        eps: summary_pivot(group.groupby("weight").filter(lambda g: g["count"].sum() == 100), "weight",
+                            values=[column])[column].to_dict()
         for eps, group in ios_df.groupby("epsilon")
     }
 
     all_weights = ['1', '1.2', '1.5', '2', '5', '10']
 
-    colors = ['#000000', '#E69F00', '#56B4E9', '#009E73', '#F0E442', '#0072B2', '#D55E00', '#CC79A7', '#72CE6F']
-    linestyles = ['-', '--', '-.', ':']
-    markers = ['o', 's', 'D', '^', 'v', '*', 'x', 'P', 'H', '+']
-
-    style_cycler = zip(itertools.cycle(colors),
-                       itertools.cycle(linestyles),
-                       itertools.cycle(markers))
-
     plt.figure(figsize=(12, 5))
 
-    for (eps, data), (color, ls, marker) in zip(result.items(), style_cycler):
+    for (eps, data), (color, ls, marker) in zip(result.items(), style_cycler()):
         y = [data.get(float(w), None) for w in all_weights]
         plt.plot(all_weights, y, label=f"ε={eps}", color=color,
                  linestyle=ls, marker=marker, markersize=14, linewidth=4)
@@ -233,33 +218,25 @@ def generate_ios_figure(df, heuristic, expanded=True, legend=True):
     plt.savefig(f'results/figures/toh_{heuristic}_ios_{"expanded" if expanded else "quality"}.pdf')
 
 
-def generate_wa_figure(df, heuristic, expanded=True, legend=True):
-    wa_df = df[(df["alg"] == 'wa') & (df["heuristic-optimal"] == heuristic)]
-    gbfs_df = df[(df["alg"] == 'gbfs') & (df["heuristic-optimal"] == heuristic)]
+def generate_wa_figure(summary, heuristic, expanded=True, legend=True):
+    wa_df = summary.where(alg='wa', heuristic_optimal=heuristic).frame()
+    gbfs = summary.where(alg='gbfs', heuristic_optimal=heuristic)
     column = 'expanded' if expanded else 'quality'
     result = {}
     for eps, group in wa_df.groupby("epsilon"):
-        eps_result = group.groupby("weight").filter(lambda g: g["id"].count() == 100).groupby("weight")[
-            column].mean().to_dict()
+        eps_result = summary_pivot(group.groupby("weight").filter(lambda g: g["count"].sum() == 100), "weight",
+                                   values=[column])[column].to_dict()
         eps_result = {str(int(k) if int(k) == k else k): v for k, v in eps_result.items()}
-        gbfs_group = gbfs_df[gbfs_df["epsilon"] == eps]
-        if gbfs_group["id"].count() == 100:
-            eps_result["gbfs"] = gbfs_group[column].mean()
+        gbfs_group = gbfs.where(epsilon=eps).frame()
+        if gbfs_group["count"].sum() == 100:
+            eps_result["gbfs"] = weighted_mean(gbfs_group, column)
         result[eps] = eps_result
 
     all_weights = ['1', '1.2', '1.5', '2', '5', '10', 'GBFS']
 
-    colors = ['#000000', '#E69F00', '#56B4E9', '#009E73', '#F0E442', '#0072B2', '#D55E00', '#CC79A7', '#72CE6F']
-    linestyles = ['-', '--', '-.', ':']
-    markers = ['o', 's', 'D', '^', 'v', '*', 'x', 'P', 'H', '+']
-
-    style_cycler = zip(itertools.cycle(colors),
-                       itertools.cycle(linestyles),
-                       itertools.cycle(markers))
-
     plt.figure(figsize=(12, 5))
 
-    for (eps, data), (color, ls, marker) in zip(result.items(), style_cycler):
+    for (eps, data), (color, ls, marker) in zip(result.items(), style_cycler()):
         y = [data.get(w.lower(), None) for w in all_weights]
         plt.plot(all_weights, y, label=f"ε={eps}", color=color,
                  linestyle=ls, marker=marker, markersize=14, linewidth=4)
@@ -286,39 +263,57 @@ def generate_wa_figure(df, heuristic, expanded=True, legend=True):
 def main():
     data_dir = r"data/toh"
     Path("results").mkdir(exist_ok=True)
-    print("Loading data")
-    result_df, h_df = parse_dir(data_dir)
+    if CHUNKED:
+        result_df = None
+        if missing_instances('toh', range(100), store_file(data_dir)):
+            # The solution quality needs the optimal costs before the results are aggregated
+            print("Streaming the optimal solutions missing from the optimal cost store")
+            sync_optimal_costs('toh', stream_optimal_solutions(iter_chunks(data_dir, parse_file, generate_results_df)),
+                               data_dir, store_file(data_dir))
+        id_to_solution = get_costs(load_store(store_file(data_dir)), 'toh')
+        print("Streaming data and verifying solution quality")
+        solutions, summary_df, h_df = stream_logs(data_dir, parse_file, generate_results_df, generate_init_heuristic_df,
+                                                  lambda df: add_solution_quality(df, id_to_solution))
+        print("Verifying optimal solutions against the optimal cost store")
+        id_to_solution = sync_optimal_costs('toh', solutions, data_dir, store_file(data_dir))
+    else:
+        print("Loading data")
+        result_df, h_df = parse_dir(data_dir)
+        print("Verifying optimal solutions against the optimal cost store")
+        id_to_solution = get_optimal_solutions(result_df)
+        id_to_solution = sync_optimal_costs('toh', id_to_solution, data_dir, store_file(data_dir))
+        print("Adding and verifying solution quality")
+        add_solution_quality(result_df, id_to_solution)
+        summary_df = summarize_results(result_df)
     print("Verifying instance count")
-    verify_count(result_df, True)
-    print("Verifying optimal solutions")
-    id_to_solution = get_optimal_solutions(result_df)
-    print("Adding and verifying solution quality")
-    add_solution_quality(result_df, id_to_solution)
+    verify_count(summary_df, True)
     print("Verifying heuristic admissibility")
     verify_heuristics(h_df, id_to_solution)
     print("Generating Excel")
-    # write_to_excel(result_df, h_df)
+    # write_to_excel(result_df, h_df, summary_df)
+    summary, h_set = ResultSet(summary_df), ResultSet(h_df, HEURISTIC_COLUMNS)
     print("Generating LaTex tabular code")
     Path("results/latex").mkdir(exist_ok=True)
     solution_list = [id_to_solution[i] for i in range(100)]
-    gen_wa_table_latex(result_df, h_df, solution_list)
-    gen_ios_table_latex(result_df, h_df, solution_list)
+    gen_wa_table_latex(summary, h_set, solution_list)
+    gen_ios_table_latex(summary, h_set, solution_list)
     print("Generating figures")
-    generate_ios_figure(result_df, '10+2', True, False)
-    generate_ios_figure(result_df, '10+2', False, False)
-    generate_ios_figure(result_df, '8+4', True, False)
-    generate_ios_figure(result_df, '8+4', False, False)
-    generate_ios_figure(result_df, '6+6', True, False)
-    generate_ios_figure(result_df, '6+6', False, True)
-    generate_wa_figure(result_df, '10+2', True, False)
-    generate_wa_figure(result_df, '10+2', False, False)
-    generate_wa_figure(result_df, '8+4', True, False)
-    generate_wa_figure(result_df, '8+4', False, False)
-    generate_wa_figure(result_df, '6+6', True, False)
-    generate_wa_figure(result_df, '6+6', False, True)
+    generate_ios_figure(summary, '10+2', True, False)
+    generate_ios_figure(summary, '10+2', False, False)
+    generate_ios_figure(summary, '8+4', True, False)
+    generate_ios_figure(summary, '8+4', False, False)
+    generate_ios_figure(summary, '6+6', True, False)
+    generate_ios_figure(summary, '6+6', False, True)
+    generate_wa_figure(summary, '10+2', True, False)
+    generate_wa_figure(summary, '10+2', False, False)
+    generate_wa_figure(summary, '8+4', True, False)
+    generate_wa_figure(summary, '8+4', False, False)
+    generate_wa_figure(summary, '6+6', True, False)
+    generate_wa_figure(summary, '6+6', False, True)
 
 
 
 if __name__ == '__main__':
     WEIGHTS = [1, 1.2, 1.5, 2, 5, 10]
+    CHUNKED = '--chunked' in sys.argv  # Stream the logs instead of loading them all into memory
     main()
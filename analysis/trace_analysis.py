@@ -0,0 +1,210 @@
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from matplotlib import pyplot as plt
+
+from aggregation import CONFIG_COLUMNS, iter_log_files, open_log
+from formatting import round_half_up, style_cycler
+from optimal_store import get_costs, load_store, store_file
+
+TRACE_SUFFIXES = ['.trace']
+TRACE_COLUMNS = ['expanded', 'time', 'f', 'h', 'min-h', 'phase', 'incumbent']
+# Expansion budgets of the anytime profiles: 1, 2 and 5 times every power of 10 up to 10^9
+BUDGETS = np.array([m * 10 ** e for e in range(10) for m in (1, 2, 5)], dtype=float)
+PROFILE_VALUES = ['solved', 'quality', 'progress', 'time']
+
+
+# The drivers write a trace of every search into a sidecar file of the log when run with -t (see SearchTrace in
+# src/paper/SearchTelemetry.h). The traces are read one file at a time, and every search is reduced to its values at
+# the expansion budgets (the last sample within each budget) and added into per-configuration sums, so the memory is
+# bounded by the largest trace file plus the number of configurations times the number of budgets:
+# - solved: the share of the searches that found a solution within the budget
+# - quality: the mean cost of the best solution found within the budget over the optimal cost (solved searches only)
+# - progress: the mean 1 - (lowest h expanded) / (h of the start), 1 once the goal is expanded
+# - time: the mean elapsed seconds of the searches still running at the budget
+# and, for IOS, to the expansions of its greedy and optimal phases.
+
+
+def samples_frame(rows):
+    df = pd.DataFrame(rows, columns=TRACE_COLUMNS)
+    return df.astype({column: float for column in TRACE_COLUMNS if column != 'phase'})
+
+
+def iter_searches(file_path: Path):
+    # Yields the (context, samples) of every search of a trace file, where the context has the values of the [D], [I]
+    # and [A] lines before the search
+    context = {}
+    rows = []
+    with open_log(file_path) as f:
+        for line in f:
+            if line.startswith('['):
+                if rows:
+                    yield context.copy(), samples_frame(rows)
+                    rows = []
+                context.update(dict(item.split(": ") for item in line[3:].strip().split("; ")))
+            elif line.strip():
+                rows.append(line.split())
+    if rows:
+        yield context.copy(), samples_frame(rows)
+
+
+def search_profile(samples, optimal=None):
+    expanded = samples['expanded'].to_numpy()
+    at_budget = samples.iloc[np.searchsorted(expanded, BUDGETS, side='right') - 1]
+    incumbent = at_budget['incumbent'].to_numpy()
+    start_h = samples['h'].iloc[0]
+    solved = np.isfinite(incumbent)
+    quality = incumbent / optimal if optimal else np.full(len(BUDGETS), np.nan)
+    return {
+        'solved': solved.astype(float),
+        'quality': np.where(solved, quality, np.nan),
+        'progress': 1 - at_budget['min-h'].to_numpy() / start_h if start_h > 0 else np.full(len(BUDGETS), np.nan),
+        'time': np.where(BUDGETS < expanded[-1], at_budget['time'].to_numpy(), np.nan),
+    }
+
+
+def empty_profile():
+    profile = {'searches': 0, 'max-expanded': 0, 'greedy-expanded': 0, 'optimal-expanded': 0}
+    for value in PROFILE_VALUES:
+        profile[f'{value}-sum'] = np.zeros(len(BUDGETS))
+        profile[f'{value}-count'] = np.zeros(len(BUDGETS))
+    return profile
+
+
+def add_search(profile, samples, optimal=None):
+    for value, values in search_profile(samples, optimal).items():
+        known = ~np.isnan(values)
+        profile[f'{value}-sum'] += np.where(known, values, 0)
+        profile[f'{value}-count'] += known
+    expanded = samples['expanded'].iloc[-1]
+    profile['searches'] += 1
+    profile['max-expanded'] = max(profile['max-expanded'], expanded)
+    if (samples['phase'] != '-').any():
+        # IOS: its greedy phase ends with the first sample of the optimal phase (which is always sampled)
+        optimal_phase = samples.loc[samples['phase'] == 'o', 'expanded']
+        greedy = optimal_phase.iloc[0] if not optimal_phase.empty else expanded
+        profile['greedy-expanded'] += greedy
+        profile['optimal-expanded'] += expanded - greedy
+
+
+def config_key(context):
+    return tuple(float(context[column]) if column in ['weight', 'epsilon'] else context[column]
+                 for column in CONFIG_COLUMNS)
+
+
+def stream_profiles(dir_path, optimal_costs):
+    profiles = {}
+    for file_path in iter_log_files(dir_path, TRACE_SUFFIXES):
+        # Traces are appended to, so a search rerun after its batch was killed is kept once, by its last trace
+        searches = {(config_key(context), int(context['id'])): samples for context, samples in iter_searches(file_path)}
+        for (key, id_value), samples in searches.items():
+            add_search(profiles.setdefault(key, empty_profile()), samples, optimal_costs.get(id_value))
+    return profiles
+
+
+def finalize_profiles(profiles):
+    # One row per configuration and budget, up to the first budget that all the searches of the configuration ended in
+    rows = []
+    for key, profile in profiles.items():
+        for i, budget in enumerate(BUDGETS[:np.searchsorted(BUDGETS, profile['max-expanded']) + 1]):
+            row = dict(zip(CONFIG_COLUMNS, key))
+            row.update({'budget': budget, 'searches': profile['searches']})
+            for value in PROFILE_VALUES:
+                count = profile[f'{value}-count'][i]
+                row[value] = profile[f'{value}-sum'][i] / count if count > 0 else np.nan
+            rows.append(row)
+    return pd.DataFrame(rows, columns=CONFIG_COLUMNS + ['budget', 'searches'] + PROFILE_VALUES)
+
+
+def phases_df(profiles):
+    rows = [dict(zip(CONFIG_COLUMNS, key), searches=profile['searches'],
+                 greedy=profile['greedy-expanded'] / profile['searches'],
+                 optimal=profile['optimal-expanded'] / profile['searches'])
+            for key, profile in profiles.items() if key[0] == 'ios']
+    df = pd.DataFrame(rows, columns=CONFIG_COLUMNS + ['searches', 'greedy', 'optimal'])
+    df['greedy-share'] = df['greedy'] / (df['greedy'] + df['optimal'])
+    return df
+
+
+def gen_phases_table_latex(phases, domain):
+    pivot = phases.pivot_table(index=['heuristic-optimal', 'heuristic-greedy', 'epsilon'], columns='weight',
+                               values=['greedy', 'greedy-share'], aggfunc='mean')
+    pivot = pivot.sort_index(level='epsilon', ascending=False).reset_index()
+    pivot = pivot.sort_values(by=['heuristic-optimal', 'heuristic-greedy', 'epsilon'], ascending=[True, True, False])
+    weights = sorted(phases['weight'].unique())
+    latex_str = r"\begin{tabular}{ccc" + ('r' * 2 * len(weights)) + "}\n"
+    latex_str += '\\toprule\nOptimal & Greedy & Epsilon'
+    for weight in weights:
+        latex_str += f' & {weight:g}-g & {weight:g}-\\%'
+    latex_str += ' \\\\\n\\midrule\n'
+    for _, row in pivot.iterrows():
+        latex_str += (f"{row[('heuristic-optimal', '')]} & {row[('heuristic-greedy', '')]} & "
+                      f"{round_half_up(row[('epsilon', '')], 2)}")
+        for weight in weights:
+            greedy = row.get(('greedy', weight), np.nan)
+            if math.isnan(greedy):
+                latex_str += ' & - & -'
+            else:
+                latex_str += f" & {round_half_up(greedy, 0):,} & {round_half_up(100 * row[('greedy-share', weight)], 1)}"
+        latex_str += ' \\\\\n'
+    latex_str += '\\bottomrule\n\\end{tabular}'
+    with open(f'results/latex/{domain}_ios_phases.tex', 'w+') as f:
+        f.write(latex_str)
+
+
+def generate_profile_figure(profile_df, domain, alg, column='solved', legend=True):
+    df = profile_df[profile_df['alg'] == alg]
+    if df.empty:
+        return
+    result = {weight: group.groupby('budget')[column].mean().to_dict() for weight, group in df.groupby('weight')}
+
+    plt.figure(figsize=(12, 5))
+
+    for (weight, data), (color, ls, marker) in zip(result.items(), style_cycler()):
+        plt.plot(list(data.keys()), list(data.values()), label=f"w={weight:g}", color=color,
+                 linestyle=ls, marker=marker, markersize=14, linewidth=4)
+
+    plt.xlabel('Expansions', fontsize=26, fontweight='bold')
+    plt.xscale('log')
+    plt.xticks(fontsize=22, fontweight='bold')
+    plt.yticks(fontsize=22, fontweight='bold')
+    plt.ylabel(column.capitalize(), fontsize=26, fontweight='bold')
+    if legend:
+        plt.legend(frameon=True, ncol=2, prop={'size': 22, 'weight': 'bold'})
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(f'results/figures/{domain}_{alg}_{column}_profile.pdf')
+    plt.close()
+
+
+def main():
+    # python3 analysis/trace_analysis.py <domain> [trace dir, data/<domain> by default]
+    domain = sys.argv[1] if len(sys.argv) > 1 else 'stp'
+    dir_path = sys.argv[2] if len(sys.argv) > 2 else f'data/{domain}'
+    print("Loading traces")
+    profiles = stream_profiles(dir_path, get_costs(load_store(store_file(dir_path)), domain))
+    if not profiles:
+        print(f"No traces in {dir_path}, run the sweep with TRACE_EVERY=<N>")
+        return
+    profile_df = finalize_profiles(profiles)
+    phases = phases_df(profiles)
+    Path("results").mkdir(exist_ok=True)
+    with pd.ExcelWriter(f'results/{domain}_traces.xlsx') as writer:
+        profile_df.to_excel(writer, sheet_name="profiles", index=False)
+        phases.to_excel(writer, sheet_name="ios-phases", index=False)
+    if not phases.empty:
+        print("Generating LaTex tabular code")
+        Path("results/latex").mkdir(parents=True, exist_ok=True)
+        gen_phases_table_latex(phases, domain)
+    print("Generating figures")
+    Path("results/figures").mkdir(parents=True, exist_ok=True)
+    generate_profile_figure(profile_df, domain, 'wa', 'progress')
+    generate_profile_figure(profile_df, domain, 'wa', 'solved', legend=False)
+    generate_profile_figure(profile_df, domain, 'ios', 'solved', legend=False)
+
+
+if __name__ == '__main__':
+    main()
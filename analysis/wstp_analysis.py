@@ -1,6 +1,5 @@
-import itertools
 import math
-from decimal import Decimal, ROUND_HALF_UP
+import sys
 from os import PathLike
 from pathlib import Path
 
@@ -9,10 +8,12 @@ from matplotlib import pyplot as plt
 from pandas import DataFrame
 from scipy.stats import kendalltau
 
-DISTANCES = [57, 55, 59, 56, 56, 52, 52, 50, 46, 59, 57, 45, 46, 59, 62, 42, 66, 55, 46, 52, 54, 59, 49, 54, 52, 58,
-             53, 52, 54, 47, 50, 59, 60, 52, 55, 52, 58, 53, 49, 54, 54, 42, 64, 50, 51, 49, 47, 49, 59, 53, 56, 56,
-             64, 56, 41, 55, 50, 51, 57, 66, 45, 57, 56, 51, 47, 61, 50, 51, 53, 52, 44, 56, 49, 56, 48, 57, 54, 53,
-             42, 57, 53, 62, 49, 55, 44, 45, 52, 65, 54, 50, 57, 57, 46, 53, 50, 49, 44, 54, 57, 54]
+from aggregation import (MEMORY_VALUES, iter_log_files, open_log, stream_logs, stream_optimal_solutions,
+                         summarize_results, summary_pivot, weighted_mean)
+from formatting import round_half_up, style_cycler
+from optimal_store import require_costs, store_file, sync_optimal_costs
+from result_set import HEURISTIC_COLUMNS, ResultSet
+from stp_instances import DISTANCES
 
 SOLUTIONS = [461, 389, 418, 429, 436, 392, 383, 402, 324, 429, 432, 340, 365, 446, 479, 321, 526, 463, 368, 400, 376,
              467, 384, 425, 387, 461, 428, 427, 443, 386, 400, 398, 475, 360, 457, 377, 447, 425, 378, 424, 363, 313,
@@ -21,15 +22,10 @@ SOLUTIONS = [461, 389, 418, 429, 436, 392, 383, 402, 324, 429, 432, 340, 365, 44
              316, 325, 355, 510, 385, 396, 421, 412, 353, 383, 373, 376, 325, 408, 409, 377]
 
 
-def round_half_up(value, decimals):
-    d = Decimal(value)
-    return d.quantize(Decimal('1e-{0}'.format(decimals)), rounding=ROUND_HALF_UP)
-
-
 def parse_file(file_path: Path) -> DataFrame:
     current_dict = {}
     dicts = []
-    with open(file_path, 'r') as f:
+    with open_log(file_path) as f:
         for line in f:
             if line.startswith('[D]') or line.startswith('[I]') or line.startswith('[R]'):
                 current_dict.update(dict(item.split(": ") for item in line[3:].strip().split("; ")))
@@ -40,7 +36,7 @@ def parse_file(file_path: Path) -> DataFrame:
 
 def parse_dir(dir_path: str | PathLike[str]):
     dir_path = Path(dir_path)
-    dfs = [parse_file(file_path) for file_path in dir_path.rglob('*') if file_path.suffix in ['.out', '.txt', '.log']]
+    dfs = [parse_file(file_path) for file_path in iter_log_files(dir_path)]
     return (generate_results_df([df for df in dfs if 'init-ho' not in df.columns]),
             generate_init_heuristic_df([df for df in dfs if 'init-ho' in df.columns]))
 
@@ -64,11 +60,15 @@ def generate_results_df(dfs_list):
     df['weight'] = df['weight'].astype(float)
     df['epsilon'] = df['epsilon'].astype(float)
     df['time'] = df['time'].astype(float)
+    for column in MEMORY_VALUES:
+        if column in df.columns:  # Only in the logs of drivers that report search telemetry
+            df[column] = df[column].astype(float)
     return df
 
 
-def add_solution_quality(df):
-    df['quality'] = df.apply(lambda row: row['solution'] / SOLUTIONS[row['id']], axis=1)
+def add_solution_quality(df, solutions):
+    require_costs(solutions, df['id'].unique())
+    df['quality'] = df.apply(lambda row: row['solution'] / solutions[row['id']], axis=1)
     verify_quality(df)
     return df
 
@@ -78,13 +78,12 @@ def verify_quality(df):
         raise ValueError("Some rows have 'quality' not between 1 and 'weight'.")
 
 
-def verify_heuristics(df):
-    if not ((df['init-ho'] <= df['id'].astype(int).apply(lambda x: SOLUTIONS[x])) &
-            (df['init-hg'] <= df['id'].astype(int).apply(lambda x: SOLUTIONS[x]))).all():
+def verify_heuristics(df, solutions):
+    if not ((df['init-ho'] <= df['id'].map(solutions)) & (df['init-hg'] <= df['id'].map(solutions))).all():
         raise ValueError("Some heuristics are not admissible.")
 
 
-def calc_heuristics_stats(df):
+def calc_heuristics_stats(df, solutions):
     epsilons = [0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1]
     optimal_heuristics = ['wmd']
     greedy_heuristics = ['md']
@@ -94,7 +93,8 @@ def calc_heuristics_stats(df):
             subset_df = subset_df.sort_values(by='id', ascending=True)
             heuristic_values = epsilon * subset_df['init-ho'] + (1 - epsilon) * subset_df['init-hg']
             tau, _ = kendalltau(DISTANCES, heuristic_values)
-            hdiff = sum([hv / sc for hv, sc in zip(heuristic_values, SOLUTIONS)]) / len(heuristic_values)
+            costs = subset_df['id'].map(solutions)
+            hdiff = sum([hv / sc for hv, sc in zip(heuristic_values, costs)]) / len(heuristic_values)
             print(
                 f'{ho} & {hg} & {round_half_up(epsilon, 2)} & {round_half_up(hdiff, 3)} & {round_half_up(tau, 3)}\\\\')
 
@@ -107,18 +107,11 @@ def expansions_table(df):
             f"{row['alg']} & {row['heuristic-optimal']} & {row['heuristic-greedy']} & {row['weight']} & {round_half_up(row['epsilon'], 2)} & {round_half_up(row['expanded'], 0):,} & {round_half_up(row['quality'], 3)}\\\\")
 
 
-def gen_wa_table_latex(result_df, h_df):
-    gbfs_df = result_df[(result_df['alg'] == 'gbfs')]
-    gbfs_pivot = gbfs_df.pivot_table(values=['expanded', 'quality'],
-                                     index=['heuristic-optimal', 'heuristic-greedy', 'epsilon'],
-                                     aggfunc='mean')
-    result_df = result_df[(result_df['alg'] == 'wa')]
-    pivot = result_df.pivot_table(
-        index=['heuristic-optimal', 'heuristic-greedy', 'epsilon'],
-        columns='weight',
-        values=['expanded', 'quality', 'id'],
-        aggfunc={'expanded': 'mean', 'quality': 'mean', 'id': 'count'}
-    )
+def gen_wa_table_latex(summary, h_set, solutions):
+    gbfs_df = summary.where(alg='gbfs').frame()
+    gbfs_pivot = summary_pivot(gbfs_df, ['heuristic-optimal', 'heuristic-greedy', 'epsilon'])
+    summary_df = summary.where(alg='wa').frame()
+    pivot = summary_pivot(summary_df, ['heuristic-optimal', 'heuristic-greedy', 'epsilon'], 'weight')
     pivot = pivot.sort_index(level='epsilon', ascending=False).reset_index()
     pivot = pivot.sort_values(by=['heuristic-optimal', 'epsilon'], ascending=[True, False])
     latex_str = r"\begin{tabular}{ccccc" + ('r' * 2 * len(WEIGHTS)) + "rr}\n"
@@ -131,18 +124,18 @@ def gen_wa_table_latex(result_df, h_df):
         ho = row[('heuristic-optimal', '')]
         hg = row[('heuristic-greedy', '')]
         epsilon = row[('epsilon', '')]
-        subset_df = h_df[(h_df["heuristic-optimal"] == ho) & (h_df["heuristic-greedy"] == hg)]
-        subset_df = subset_df.sort_values(by='id', ascending=True)
+        subset_df = h_set.where(heuristic_optimal=ho, heuristic_greedy=hg).frame()
         heuristic_values = epsilon * subset_df['init-ho'] + (1 - epsilon) * subset_df['init-hg']
         tau, _ = kendalltau(DISTANCES, heuristic_values)
-        hdiff = sum([hv / sc for hv, sc in zip(heuristic_values, SOLUTIONS)]) / len(heuristic_values)
+        costs = subset_df['id'].map(solutions)
+        hdiff = sum([hv / sc for hv, sc in zip(heuristic_values, costs)]) / len(heuristic_values)
         latex_str += f'{ho} & {hg} & {round_half_up(epsilon, 2)} & {round_half_up(hdiff, 3)} & {round_half_up(tau, 3)}'
         for weight in WEIGHTS:
-            if ('id', weight) in row:
-                if row[('id', weight)] == 100:
+            if ('count', weight) in row:
+                if row.get(('count', weight), 0) == 100:
                     latex_str += f" & {round_half_up(row[('expanded', weight)], 0):,} & {round_half_up(row[('quality', weight)], 3):,}"
                 else:
-                    value = row[('id', weight)]
+                    value = row.get(('count', weight), 0)
                     int_value = 0 if math.isnan(value) else int(value)
                     latex_str += f" & \multicolumn{{2}}{{c}}{{\#{int_value}}}"
             else:
@@ -159,14 +152,9 @@ def gen_wa_table_latex(result_df, h_df):
         f.write(latex_str)
 
 
-def gen_ios_table_latex(result_df, h_df):
-    result_df = result_df[result_df['alg'] == 'ios']
-    pivot = result_df.pivot_table(
-        index=['heuristic-optimal', 'heuristic-greedy', 'epsilon'],
-        columns='weight',
-        values=['expanded', 'quality', 'id'],
-        aggfunc={'expanded': 'mean', 'quality': 'mean', 'id': 'count'}
-    )
+def gen_ios_table_latex(summary, h_set, solutions):
+    summary_df = summary.where(alg='ios').frame()
+    pivot = summary_pivot(summary_df, ['heuristic-optimal', 'heuristic-greedy', 'epsilon'], 'weight')
     pivot = pivot.sort_index(level='epsilon', ascending=False).reset_index()
     latex_str = r"\begin{tabular}{ccccc" + ('r' * 2 * len(WEIGHTS[1:])) + "rr}\n"
     latex_str += '\\toprule\n\\multirow{2}{*}{Proving} & \\multirow{2}{*}{Finding} & \\multirow{2}{*}{Epsilon} & \\multirow{2}{*}{$h/C^*$} & \\multirow{2}{*}{GDRC} '
@@ -185,18 +173,18 @@ def gen_ios_table_latex(result_df, h_df):
         ho = row[('heuristic-optimal', '')]
         hg = row[('heuristic-greedy', '')]
         epsilon = row[('epsilon', '')]
-        subset_df = h_df[(h_df["heuristic-optimal"] == ho) & (h_df["heuristic-greedy"] == hg)]
-        subset_df = subset_df.sort_values(by='id', ascending=True)
+        subset_df = h_set.where(heuristic_optimal=ho, heuristic_greedy=hg).frame()
         heuristic_values = epsilon * subset_df['init-ho'] + (1 - epsilon) * subset_df['init-hg']
         tau, _ = kendalltau(DISTANCES, heuristic_values)
 
-        hdiff = sum([hv / sc for hv, sc in zip(heuristic_values, SOLUTIONS)]) / len(heuristic_values)
+        costs = subset_df['id'].map(solutions)
+        hdiff = sum([hv / sc for hv, sc in zip(heuristic_values, costs)]) / len(heuristic_values)
         latex_str += f'{ho} & {hg} & {round_half_up(epsilon, 2)} & {round_half_up(hdiff, 3)} & {round_half_up(tau, 3)}'
         for weight in WEIGHTS[1:]:
-            if row[('id', weight)] == 100:
+            if row.get(('count', weight), 0) == 100:
                 latex_str += f" & {round_half_up(row[('expanded', weight)], 0):,} & {round_half_up(row[('quality', weight)], 3):,}"
             else:
-                latex_str += f" & \multicolumn{{2}}{{c}}{{\#{row[('id', weight)]}}}"
+                latex_str += f" & \multicolumn{{2}}{{c}}{{\#{row.get(('count', weight), 0)}}}"
         latex_str += ' \\\\\n'
 
     latex_str += '\\bottomrule\n\\end{tabular}'
@@ -205,33 +193,28 @@ def gen_ios_table_latex(result_df, h_df):
         f.write(latex_str)
 
 
-def write_to_excel(result_df, h_df, filename="results/wstp.xlsx"):
+def write_to_excel(result_df, h_df, summary_df, filename="results/wstp.xlsx"):
     with pd.ExcelWriter(filename) as writer:
-        result_df.to_excel(writer, sheet_name="results", index=False)
+        if result_df is not None:  # Per-run results are not kept in memory in chunked mode
+            result_df.to_excel(writer, sheet_name="results", index=False)
         h_df.to_excel(writer, sheet_name="heuristics", index=False)
+        summary_df.to_excel(writer, sheet_name="summary", index=False)
 
 
-def generate_ios_figure(df, expanded=True, legend=True):
-    ios_df = df[df["alg"] == 'ios']
+def generate_ios_figure(summary, expanded=True, legend=True):
+    ios_df = summary.where(alg='ios').frame()
     column = 'expanded' if expanded else 'quality'
     result = {
-        eps: group.groupby("weight").filter(lambda g: g["id"].count() == 100).groupby("weight")[column].mean().to_dict()
+        eps: summary_pivot(group.groupby("weight").filter(lambda g: g["count"].sum() == 100), "weight",
+                            values=[column])[column].to_dict()
         for eps, group in ios_df.groupby("epsilon")
     }
 
     all_weights = ['1', '1.2', '1.5', '2', '5', '10', '20', '50']
 
-    colors = ['#000000', '#E69F00', '#56B4E9', '#009E73', '#F0E442', '#0072B2', '#D55E00', '#CC79A7', '#72CE6F']
-    linestyles = ['-', '--', '-.', ':']
-    markers = ['o', 's', 'D', '^', 'v', '*', 'x', 'P', 'H', '+']
-
-    style_cycler = zip(itertools.cycle(colors),
-                       itertools.cycle(linestyles),
-                       itertools.cycle(markers))
-
     plt.figure(figsize=(12, 5))
 
-    for (eps, data), (color, ls, marker) in zip(result.items(), style_cycler):
+    for (eps, data), (color, ls, marker) in zip(result.items(), style_cycler()):
         y = [data.get(float(w), None) for w in all_weights]
         plt.plot(all_weights, y, label=f"ε={eps}", color=color,
                  linestyle=ls, marker=marker, markersize=14, linewidth=4)
@@ -256,33 +239,25 @@ def generate_ios_figure(df, expanded=True, legend=True):
     plt.savefig(f'results/figures/wstp_ios_{"expanded" if expanded else "quality"}.pdf')
 
 
-def generate_wa_figure(df, expanded=True, legend=True):
-    wa_df = df[df["alg"] == 'wa']
-    gbfs_df = df[df["alg"] == 'gbfs']
+def generate_wa_figure(summary, expanded=True, legend=True):
+    wa_df = summary.where(alg='wa').frame()
+    gbfs = summary.where(alg='gbfs')
     column = 'expanded' if expanded else 'quality'
     result = {}
     for eps, group in wa_df.groupby("epsilon"):
-        eps_result = group.groupby("weight").filter(lambda g: g["id"].count() == 100).groupby("weight")[
-            column].mean().to_dict()
+        eps_result = summary_pivot(group.groupby("weight").filter(lambda g: g["count"].sum() == 100), "weight",
+                                   values=[column])[column].to_dict()
         eps_result = {str(int(k) if int(k) == k else k): v for k, v in eps_result.items()}
-        gbfs_group = gbfs_df[gbfs_df["epsilon"] == eps]
-        if gbfs_group["id"].count() == 100:
-            eps_result["gbfs"] = gbfs_group[column].mean()
+        gbfs_group = gbfs.where(epsilon=eps).frame()
+        if gbfs_group["count"].sum() == 100:
+            eps_result["gbfs"] = weighted_mean(gbfs_group, column)
         result[eps] = eps_result
 
     all_weights = ['1', '1.2', '1.5', '2', '5', '10', '20', '50', 'GBFS']
 
-    colors = ['#000000', '#E69F00', '#56B4E9', '#009E73', '#F0E442', '#0072B2', '#D55E00', '#CC79A7', '#72CE6F']
-    linestyles = ['-', '--', '-.', ':']
-    markers = ['o', 's', 'D', '^', 'v', '*', 'x', 'P', 'H', '+']
-
-    style_cycler = zip(itertools.cycle(colors),
-                       itertools.cycle(linestyles),
-                       itertools.cycle(markers))
-
     plt.figure(figsize=(12, 5))
 
-    for (eps, data), (color, ls, marker) in zip(result.items(), style_cycler):
+    for (eps, data), (color, ls, marker) in zip(result.items(), style_cycler()):
         y = [data.get(w.lower(), None) for w in all_weights]
         plt.plot(all_weights, y, label=f"ε={eps}", color=color,
                  linestyle=ls, marker=marker, markersize=14, linewidth=4)
@@ -310,25 +285,40 @@ def generate_wa_figure(df, expanded=True, legend=True):
 def main():
     data_dir = r"data/wstp"
     Path("results").mkdir(exist_ok=True)
-    print("Loading data")
-    result_df, h_df = parse_dir(data_dir)
-    print("Adding and verifying solution quality")
-    add_solution_quality(result_df)
+    print("Verifying the known optimal solutions against the optimal cost store")
+    id_to_solution = sync_optimal_costs('wstp', dict(enumerate(SOLUTIONS)), 'SOLUTIONS', store_file(data_dir))
+    if CHUNKED:
+        result_df = None
+        print("Streaming data and verifying solution quality")
+        solutions, summary_df, h_df = stream_logs(data_dir, parse_file, generate_results_df, generate_init_heuristic_df,
+                                                  lambda df: add_solution_quality(df, id_to_solution))
+        print("Verifying optimal solutions against the optimal cost store")
+        sync_optimal_costs('wstp', solutions, data_dir, store_file(data_dir))
+    else:
+        print("Loading data")
+        result_df, h_df = parse_dir(data_dir)
+        print("Verifying optimal solutions against the optimal cost store")
+        sync_optimal_costs('wstp', stream_optimal_solutions([result_df]), data_dir, store_file(data_dir))
+        print("Adding and verifying solution quality")
+        add_solution_quality(result_df, id_to_solution)
+        summary_df = summarize_results(result_df)
     print("Verifying heuristic admissibility")
-    verify_heuristics(h_df)
+    verify_heuristics(h_df, id_to_solution)
     print("Generating Excel")
-    write_to_excel(result_df, h_df)
+    write_to_excel(result_df, h_df, summary_df)
+    summary, h_set = ResultSet(summary_df), ResultSet(h_df, HEURISTIC_COLUMNS)
     print("Generating LaTex tabular code")
     Path("results/latex").mkdir(exist_ok=True)
-    gen_wa_table_latex(result_df, h_df)
-    gen_ios_table_latex(result_df, h_df)
+    gen_wa_table_latex(summary, h_set, id_to_solution)
+    gen_ios_table_latex(summary, h_set, id_to_solution)
     print("Generating figures")
-    generate_wa_figure(result_df, True, False)
-    generate_wa_figure(result_df, False, False)
-    generate_ios_figure(result_df, True, False)
-    generate_ios_figure(result_df, False, True)
+    generate_wa_figure(summary, True, False)
+    generate_wa_figure(summary, False, False)
+    generate_ios_figure(summary, True, False)
+    generate_ios_figure(summary, False, True)
 
 
 if __name__ == '__main__':
     WEIGHTS = [1, 1.2, 1.5, 2, 5, 10, 20, 50]
+    CHUNKED = '--chunked' in sys.argv  # Stream the logs instead of loading them all into memory
     main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'analysis'))
+from instance_ranges import format_instance_args
+from optimal_store import import_costs, missing_instances, store_file
+
+BINARY = "./src/bin/release/balance"
+GRIDS_FILE = Path(__file__).resolve().parent / 'sweep_grids.sh'
+INSTANCES = 100
+
+
+def read_grids(file_path=GRIDS_FILE):
+    # The name=(values) arrays of the grids file sourced by the sweep scripts
+    grids = {}
+    with open(file_path, 'r') as f:
+        for line in f:
+            match = re.match(r'(\w+)=\((.*)\)\s*$', line)
+            if match:
+                grids[match[1]] = match[2].split()
+    return grids
+
+
+GRIDS = read_grids()
+EPSILONS = GRIDS['epsilons']
+
+# The configurations and output file names of scripts/{stp,wstp,toh}.sh, with their grids read from the same file, so
+# the analysis scripts can read the results of both without changes
+SWEEPS = {
+    'stp': {
+        'output': 'data/stp',
+        'runs': [('stp', 'stp_heu_init.out', ['-d', 'STP', '-ho', 'ridge', '-hg', 'ridge1', '-p', 'pdbs/'])],
+    },
+    'wstp': {
+        'output': 'data/wstp',
+        'runs': [('wstp', 'wstp_heu_init.out', ['-d', 'WSTP', '-ho', 'wmd', '-hg', 'md'])],
+    },
+    'toh': {
+        'output': 'data/toh',
+        'runs': [(f'toh_{i}', f'toh_{i}_init.out', ['-d', 'TOH', '-ho', f'{i}+{12 - i}', '-hg', f'{i}+0'])
+                 for i in [10, 8, 6]],
+    },
+}
+for domain, sweep in SWEEPS.items():
+    sweep['weights'] = GRIDS[f'{domain}_weights']
+    sweep['ios-weights'] = GRIDS[f'{domain}_ios_weights']
+
+
+def sweep_configurations(domain):
+    # (output file name, balance arguments) of every search configuration of the domain's sweep, in script order
+    sweep = SWEEPS[domain]
+    for prefix, _, args in sweep['runs']:
+        for epsilon in EPSILONS:
+            yield f'{prefix}_gbfs_e{epsilon}.out', args + ['-a', 'GBFS', '-w', '1', '-e', epsilon]
+        for weight in sweep['weights']:
+            for epsilon in EPSILONS:
+                yield f'{prefix}_wa_w{weight}_e{epsilon}.out', args + ['-a', 'WA', '-w', weight, '-e', epsilon]
+        for weight in sweep['ios-weights']:
+            for epsilon in EPSILONS:
+                yield f'{prefix}_ios_w{weight}_e{epsilon}.out', args + ['-a', 'IOS', '-w', weight, '-e', epsilon]
+
+
+def is_optimal_search(balance_args):
+    # WA* with weight 1 only contributes the optimal solution costs (and the weight 1 cells of the tables)
+    return balance_args[balance_args.index('-a') + 1] == 'WA' and balance_args[balance_args.index('-w') + 1] == '1'
+
+
+def read_progress(file_path):
+    # Returns the id, expanded, time and solution of every finished instance, in id order, and the pruning reason if
+    # the configuration was pruned
+    results = {}
+    pruned = None
+    if not file_path.exists():
+        return [], pruned
+    instance = None
+    with open(file_path, 'r') as f:
+        for line in f:
+            if line.startswith('[I]') or line.startswith('[R]') or line.startswith('[P]'):
+                fields = dict(item.split(": ") for item in line[3:].strip().split("; "))
+                if line.startswith('[I]'):
+                    instance = int(fields['id'])
+                elif line.startswith('[R]'):
+                    results[instance] = {'id': instance, 'expanded': int(fields['expanded']),
+                                         'time': float(fields['time'].rstrip('s')), 'solution': float(fields['solution'])}
+                else:
+                    pruned = fields['reason']
+    return [results[i] for i in sorted(results)], pruned
+
+
+def prune_reason(results, args):
+    # Only the budgets given on the command line prune a configuration, and only once it has spent them: a
+    # configuration that can still finish within them is run to the end, so its table cell is the one of a full sweep
+    if args.max_expanded is not None and sum(result['expanded'] for result in results) > args.max_expanded:
+        return 'expanded-budget'
+    if args.max_time is not None and sum(result['time'] for result in results) > args.max_time:
+        return 'time-budget'
+    return None
+
+
+def run_configuration(file_path, balance_args, args):
+    # Returns the finished instances and the pruning reason. The solver's stderr goes to a .err file next to the log.
+    results, reason = read_progress(file_path)
+    if reason is not None:
+        return results, reason  # Pruned in a previous (resumed) sweep
+    err_path = file_path.with_suffix('.err')
+    while len(results) < INSTANCES and reason is None:
+        reason = prune_reason(results, args)
+        if reason is not None:
+            break
+        solved = {result['id'] for result in results}
+        batch = [i for i in range(INSTANCES) if i not in solved][:args.batch_size]
+        cmd = [args.binary] + balance_args + ['-i'] + format_instance_args(batch).split()
+        if args.trace_every:
+            # The solver appends the searches of every batch to the trace, like the results to the log
+            cmd += ['-t', str(file_path.with_suffix('.trace')), '-te', str(args.trace_every)]
+        # The solver writes directly to the log and flushes it after every instance, so the finished instances of a
+        # killed batch are kept
+        with open(file_path, 'a') as f, open(err_path, 'a') as err:
+            try:
+                subprocess.run(cmd, stdout=f, stderr=err, timeout=args.batch_timeout, check=True)
+            except subprocess.TimeoutExpired:
+                reason = 'batch-timeout'
+            except subprocess.CalledProcessError:
+                reason = 'batch-failed'
+        if reason == 'batch-failed':
+            print(f"{' '.join(cmd)} failed, see {err_path}:\n{err_path.read_text().rstrip()}", file=sys.stderr)
+        results, _ = read_progress(file_path)
+        if reason is None and len(results) == len(solved):
+            reason = 'no-progress'
+    if reason is not None:
+        with open(file_path, 'a') as f:
+            f.write(f'[P] reason: {reason}; solved: {len(results)}\n')
+    if err_path.exists() and err_path.stat().st_size == 0:
+        err_path.unlink()
+    return results, reason
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs a sweep in instance batches, pruning configurations that have "
+                                                 "spent their budget. Pruned configurations keep their finished "
+                                                 "instances, so the tables show them with the usual #count marker.")
+    parser.add_argument('domain', choices=SWEEPS.keys())
+    parser.add_argument('--binary', default=BINARY)
+    parser.add_argument('--output', help="Output directory (defaults to the one of the domain's sweep script)")
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--max-expanded', type=float, help="Total expansion budget of a configuration")
+    parser.add_argument('--max-time', type=float, help="Total search time budget of a configuration (seconds)")
+    parser.add_argument('--batch-timeout', type=float, help="Wall time limit of a single batch (seconds)")
+    parser.add_argument('--trace-every', type=int,
+                        help="Also write a progress trace of every search next to its log, sampled every N expansions")
+    parser.add_argument('--skip-optimal', action='store_true',
+                        help="Skip the weight 1 WA* configurations when the optimal cost store already has the optimal "
+                             "costs of all the instances (only heuristic and quality data is needed)")
+    parser.add_argument('--store', help="Optimal cost store file (defaults to the one next to the output directory, "
+                                        "which the analysis scripts use)")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output or SWEEPS[args.domain]['output'])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for _, init_name, balance_args in SWEEPS[args.domain]['runs']:
+        init_path = output_dir / init_name
+        if not init_path.exists():
+            print("Running initial heuristic")
+            with open(init_path, 'w') as f:
+                cmd = [args.binary] + balance_args + ['-i', f'0-{INSTANCES}', '--no-run', '-w', '1', '-e', '1']
+                subprocess.run(cmd, stdout=f, check=True)
+    store = args.store or store_file(output_dir)
+    skip_optimal = args.skip_optimal and not missing_instances(args.domain, range(INSTANCES), store)
+    if args.skip_optimal and not skip_optimal:
+        print("Not skipping the optimal searches, the optimal cost store is missing some instances")
+    if skip_optimal:
+        import_costs(args.domain, store, store_file(output_dir))  # The analysis of the results needs them
+    pruned_count = 0
+    for file_name, balance_args in sweep_configurations(args.domain):
+        if skip_optimal and is_optimal_search(balance_args):
+            print(f"Skipping {file_name}, its optimal costs are known")
+            continue
+        print(f"Running {file_name}")
+        results, reason = run_configuration(output_dir / file_name, balance_args, args)
+        if reason is not None:
+            pruned_count += 1
+            print(f"Pruned {file_name} after {len(results)} instances: {reason}")
+    print(f"{pruned_count} configurations were pruned")
+
+
+if __name__ == '__main__':
+    main()
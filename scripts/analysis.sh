@@ -9,3 +9,9 @@ echo "---Handling STP Results---"
 python3 analysis/stp_analysis.py
 echo "---Handling WSTP Results---"
 python3 analysis/wstp_analysis.py
+echo "---Handling Memory Results---"
+for domain in toh stp wstp; do
+  python3 analysis/memory_analysis.py $domain
+done
+echo "---Handling Timing Results---"
+python3 analysis/timing_analysis.py
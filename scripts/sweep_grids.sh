@@ -0,0 +1,47 @@
+#!/bin/bash
+
+# Configuration grids and helpers of the sweeps, sourced by scripts/{stp,wstp,toh}.sh. The grids are also read by
+# scripts/adaptive_sweep.py (and through it by scripts/work_queue.py), so keep every grid on a single name=(values) line
+epsilons=(1 0.99 0.9 0.75 0.5 0.25 0.1 0.01 0)
+stp_weights=(1 1.2 1.5 2 5 10 20 50)
+stp_ios_weights=(1.2 1.5 2 5 10 20 50)
+wstp_weights=(1 1.2 1.5 2 5 10 20 50)
+wstp_ios_weights=(1 1.2 1.5 2 5 10 20 50)
+toh_weights=(1 1.2 1.5 2 5 10)
+toh_ios_weights=(1.2 1.5 2 5 10)
+
+# Helpers of the sweep scripts, which set COMPRESS, OUTPUT_DIR and TRACE_EVERY before calling them
+
+# Fails unless COMPRESS is empty or one of the formats of write_log
+check_compress() {
+  case $COMPRESS in
+    ""|gz|xz|zst) ;;
+    *) echo "Unknown COMPRESS=$COMPRESS, use gz, xz or zst" >&2; return 1 ;;
+  esac
+}
+
+# Writes stdin into the log $1, through $COMPRESS if set (the analysis scripts read the compressed logs as is)
+write_log() {
+  case $COMPRESS in
+    gz) gzip -c > "$1.gz" ;;
+    xz) xz -c > "$1.xz" ;;
+    zst) zstd -q -c > "$1.zst" ;;
+    *) cat > "$1" ;;
+  esac
+}
+
+# Reports the failed run logged into $1, and makes the script exit with an error once the sweep is done
+status=0
+failed() {
+  echo "Failed: $1" >&2
+  status=1
+}
+
+# Arguments writing the trace of the run logged into $OUTPUT_DIR/$1.out into $OUTPUT_DIR/$1.trace, if TRACE_EVERY is set
+# (the solver appends to traces, so the trace of a previous run is removed, as its log is overwritten)
+trace_args() {
+  if [ -n "$TRACE_EVERY" ]; then
+    rm -f "$OUTPUT_DIR/$1.trace"
+    echo "-t $OUTPUT_DIR/$1.trace -te $TRACE_EVERY"
+  fi
+}
@@ -1,11 +1,18 @@
 #!/bin/bash
+set -o pipefail  # A pipeline into write_log fails if the solver fails
 
-OUTPUT_DIR="data/toh"
-weights=(1 1.2 1.5 2 5 10)
-epsilons=(1 0.99 0.9 0.75 0.5 0.25 0.1 0.01 0)
+source "$(dirname "$0")/sweep_grids.sh"
+weights=("${toh_weights[@]}")
+ios_weights=("${toh_ios_weights[@]}")
+REPEATS=${REPEATS:-1}  # Set REPEATS=k to run every search k times for timing analysis
+INSTANCES=${INSTANCES:-0-100}  # Set INSTANCES="$(cat results/toh_subset.txt)" for a quick screening run
+COMPRESS=${COMPRESS:-}  # Set COMPRESS=gz, xz or zst to compress the logs as they are written
+TRACE_EVERY=${TRACE_EVERY:-}  # Set TRACE_EVERY=N to also write a progress trace of every search, sampled every N expansions
 
-OUTPUT_DIR="data/toh"
-BASE_CMD="./src/bin/release/balance -d TOH -i 0-100"
+OUTPUT_DIR=${OUTPUT_DIR:-data/toh}
+BASE_CMD="./src/bin/release/balance -d TOH -i $INSTANCES -r $REPEATS"
+
+check_compress || exit 1
 
 # Move to base dir and make dirs for data and heuristics
 cd "$(dirname "$0")/.." || exit 1
@@ -17,27 +24,29 @@ for i in {10..6..-2}; do
   echo "-- Working on $ho $hg --"
   CMD="$BASE_CMD -ho $ho -hg $hg"
   echo "Running initial heuristic"
-  $CMD --no-run -w 1 -e 1 > "$OUTPUT_DIR/toh_${i}_init.out"
+  $CMD --no-run -w 1 -e 1 | write_log "$OUTPUT_DIR/toh_${i}_init.out" || failed "$OUTPUT_DIR/toh_${i}_init.out"
 
   # GBFS
   for epsilon in "${epsilons[@]}"; do
     echo "Running GBFS with e=$epsilon"
-    $CMD -a GBFS -w 1 -e "$epsilon" > "$OUTPUT_DIR/toh_${i}_gbfs_e${epsilon}.out"
+    $CMD -a GBFS -w 1 -e "$epsilon" $(trace_args "toh_${i}_gbfs_e${epsilon}") | write_log "$OUTPUT_DIR/toh_${i}_gbfs_e${epsilon}.out" || failed "$OUTPUT_DIR/toh_${i}_gbfs_e${epsilon}.out"
   done
 
   # Weighted A*
   for weight in "${weights[@]}"; do
     for epsilon in "${epsilons[@]}"; do
       echo "Running WA* with w=$weight and e=$epsilon"
-      $CMD -a WA -w "$weight" -e "$epsilon" > "$OUTPUT_DIR/toh_${i}_wa_w${weight}_e${epsilon}.out"
+      $CMD -a WA -w "$weight" -e "$epsilon" $(trace_args "toh_${i}_wa_w${weight}_e${epsilon}") | write_log "$OUTPUT_DIR/toh_${i}_wa_w${weight}_e${epsilon}.out" || failed "$OUTPUT_DIR/toh_${i}_wa_w${weight}_e${epsilon}.out"
     done
   done
 
   # IOS
-  for weight in "${weights[@]:1}"; do
+  for weight in "${ios_weights[@]}"; do
     for epsilon in "${epsilons[@]}"; do
       echo "Running IOS with w=$weight and e=$epsilon"
-      $CMD -a IOS -w "$weight" -e "$epsilon" > "$OUTPUT_DIR/toh_${i}_ios_w${weight}_e${epsilon}.out"
+      $CMD -a IOS -w "$weight" -e "$epsilon" $(trace_args "toh_${i}_ios_w${weight}_e${epsilon}") | write_log "$OUTPUT_DIR/toh_${i}_ios_w${weight}_e${epsilon}.out" || failed "$OUTPUT_DIR/toh_${i}_ios_w${weight}_e${epsilon}.out"
     done
   done
 done
+
+exit $status
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'analysis'))
+from adaptive_sweep import BINARY, INSTANCES, SWEEPS, is_optimal_search, sweep_configurations
+from optimal_store import import_costs, missing_instances, store_file
+
+STATES = ['pending', 'claimed', 'done', 'failed']
+POLL_INTERVAL = 5
+# The COMPRESS values of the sweep scripts, which are also the suffixes of the compressed logs
+COMPRESSORS = {'gz': ['gzip', '-c'], 'xz': ['xz', '-c'], 'zst': ['zstd', '-q', '-c']}
+
+# A queue is a shared directory with a sub-directory per job state. Every job is a JSON file that moves between them
+# with os.rename, which is atomic on a single file system (including NFS), so exactly one worker claims each job. A
+# claim renames the job to claimed/<job>@<worker>-<nonce>.json, a name that only its worker knows. The worker keeps
+# touching its claim, and a claim that was not touched for a whole lease (its worker died or hung) is moved back to
+# pending, so it can be claimed again under another name. A worker whose claim is gone has lost the job: it stops its
+# heartbeat and its solver, and discards its output. A worker only writes its output after moving its claim to done,
+# which fails if it lost the job, so a requeued job is finished and written by a single worker (a worker dying between
+# the two leaves a done job without output, which the analysis reports as missing instances). The lease is measured
+# with the file server's clock (the claims and a clock file of every worker are touched with the server time), so the
+# clocks of the nodes do not need to agree.
+# The results are written to <queue>/data/<domain>, with the same file names as the sweep scripts plus the instance
+# shard, so the analysis scripts can be run from the queue directory as is.
+CLAIM_SEPARATOR = '@'
+
+
+def queue_dirs(queue):
+    return {state: Path(queue) / state for state in STATES}
+
+
+def shards(shard_size, shard_file=None):
+    # (file name suffix, -i arguments) of every instance shard: contiguous ranges, or the lines of a shard file (e.g.,
+    # the per-worker instances written by analysis/load_balancing.py)
+    if shard_file is not None:
+        with open(shard_file, 'r') as f:
+            return [(f's{i}', line.strip()) for i, line in enumerate(f) if line.strip()]
+    return [(f'i{start}-{min(start + shard_size, INSTANCES)}', f'{start}-{min(start + shard_size, INSTANCES)}')
+            for start in range(0, INSTANCES, shard_size)]
+
+
+def make_jobs(domain, shard_size, shard_file=None, skip_optimal=False):
+    output = SWEEPS[domain]['output']
+    for _, init_name, balance_args in SWEEPS[domain]['runs']:
+        yield {'domain': domain, 'output': f'{output}/{init_name}', 'instances': f'0-{INSTANCES}',
+               'args': balance_args + ['--no-run', '-w', '1', '-e', '1']}
+    for file_name, balance_args in sweep_configurations(domain):
+        if skip_optimal and is_optimal_search(balance_args):
+            continue
+        stem = file_name[:-len('.out')]
+        for suffix, instances in shards(shard_size, shard_file):
+            yield {'domain': domain, 'output': f'{output}/{stem}_{suffix}.out', 'instances': instances,
+                   'args': balance_args}
+
+
+def submit(args):
+    dirs = queue_dirs(args.queue)
+    for path in dirs.values():
+        path.mkdir(parents=True, exist_ok=True)
+    queue_store = store_file(Path(args.queue) / SWEEPS[args.domain]['output'])
+    store = args.store or queue_store
+    skip_optimal = args.skip_optimal and not missing_instances(args.domain, range(INSTANCES), store)
+    if args.skip_optimal and not skip_optimal:
+        print("Not skipping the optimal searches, the optimal cost store is missing some instances")
+    if skip_optimal:
+        import_costs(args.domain, store, queue_store)  # The analysis of the queue results needs them
+    count = 0
+    for job in make_jobs(args.domain, args.shard_size, args.shard_file, skip_optimal):
+        job_name = Path(job['output']).name[:-len('.out')] + '.json'
+        if any((path / job_name).exists() for path in dirs.values()) or any(claims(dirs, job_name)):
+            continue  # Already submitted
+        tmp_file = Path(args.queue) / f'.{job_name}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(job, f)
+        os.rename(tmp_file, dirs['pending'] / job_name)
+        count += 1
+    print(f"Submitted {count} jobs")
+
+
+def claims(dirs, job_name='*.json'):
+    stem = job_name[:-len('.json')]
+    return dirs['claimed'].glob(f'{stem}{CLAIM_SEPARATOR}*.json')
+
+
+def claimed_job_name(claim_file):
+    return claim_file.name.split(CLAIM_SEPARATOR)[0] + '.json'
+
+
+def server_time(queue, worker_id):
+    # The current time of the file server, read from the modification time of a file touched by this worker
+    clock_file = Path(queue) / f'.clock-{worker_id}'
+    clock_file.touch()
+    os.utime(clock_file)
+    return clock_file.stat().st_mtime
+
+
+def requeue_expired(dirs, lease, now):
+    for claim_file in claims(dirs):
+        try:
+            if now - claim_file.stat().st_mtime > lease:
+                os.rename(claim_file, dirs['pending'] / claimed_job_name(claim_file))
+                print(f"Lease of {claim_file.name} expired, requeued it")
+        except FileNotFoundError:
+            pass  # Finished, or requeued by another worker
+
+
+def claim(dirs, worker_id):
+    for job_file in sorted(dirs['pending'].glob('*.json')):
+        claim_file = dirs['claimed'] / f'{job_file.stem}{CLAIM_SEPARATOR}{worker_id}-{uuid.uuid4().hex[:8]}.json'
+        try:
+            # Renaming keeps the modification time, so the lease is started before, or another worker could requeue
+            # the claim right away
+            os.utime(job_file)
+            os.rename(job_file, claim_file)
+        except FileNotFoundError:
+            continue  # Claimed by another worker
+        return claim_file
+    return None
+
+
+def heartbeat(claim_file, interval, stop, lost):
+    while not stop.wait(interval):
+        try:
+            os.utime(claim_file)
+        except FileNotFoundError:
+            lost.set()  # The lease expired and the job was requeued
+            return
+
+
+def run_solver(cmd, f, compress, lost):
+    # Runs the solver into f, piping its output through a compressor if needed, and returns whether both succeeded.
+    # The solver is killed if the job is lost.
+    solver = subprocess.Popen(cmd, stdout=f if compress is None else subprocess.PIPE, stderr=subprocess.DEVNULL)
+    processes = [solver]
+    if compress is not None:
+        processes.append(subprocess.Popen(COMPRESSORS[compress], stdin=solver.stdout, stdout=f))
+        solver.stdout.close()
+    while solver.poll() is None:
+        if lost.wait(1):
+            solver.kill()
+            break
+    return all([process.wait() == 0 for process in processes]) and not lost.is_set()
+
+
+def run_job(claim_file, dirs, args, worker_id):
+    # Returns the final state of the job, or 'lost' if its lease expired while it ran
+    with open(claim_file, 'r') as f:
+        job = json.load(f)
+    output = Path(args.queue) / job['output']
+    if args.compress is not None:
+        output = output.with_name(f'{output.name}.{args.compress}')
+    output.parent.mkdir(parents=True, exist_ok=True)
+    # The analysis only reads .out files, so the partial output of a dead worker is never read
+    tmp_output = output.with_name(f'{output.name}.{worker_id}.tmp')
+    cmd = [args.binary] + job['args'] + ['-i'] + job['instances'].split()
+    stop, lost = threading.Event(), threading.Event()
+    beat = threading.Thread(target=heartbeat, args=(claim_file, args.lease / 3, stop, lost), daemon=True)
+    beat.start()
+    try:
+        with open(tmp_output, 'wb') as f:
+            success = run_solver(cmd, f, args.compress, lost)
+    finally:
+        stop.set()
+        beat.join()
+    state = 'done' if success else 'failed'
+    try:
+        if lost.is_set():
+            raise FileNotFoundError
+        os.rename(claim_file, dirs[state] / claimed_job_name(claim_file))
+    except FileNotFoundError:
+        state = 'lost'  # The lease expired and the job was requeued, so it runs again (or already ran) elsewhere
+    if state == 'done':
+        os.replace(tmp_output, output)
+    else:
+        tmp_output.unlink()
+    print(f"[{worker_id}] {claimed_job_name(claim_file)}: {state}")
+    return state
+
+
+def work(args):
+    dirs = queue_dirs(args.queue)
+    worker_id = f'{socket.gethostname()}-{os.getpid()}'
+    while True:
+        requeue_expired(dirs, args.lease, server_time(args.queue, worker_id))
+        claim_file = claim(dirs, worker_id)
+        if claim_file is not None:
+            run_job(claim_file, dirs, args, worker_id)
+        elif not any(claims(dirs)):
+            (Path(args.queue) / f'.clock-{worker_id}').unlink(missing_ok=True)
+            return  # Nothing left to claim, and no claimed job can expire anymore
+        else:
+            time.sleep(POLL_INTERVAL)
+
+
+def work_parallel(args):
+    processes = [multiprocessing.Process(target=work, args=(args,)) for _ in range(args.jobs)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def status(args):
+    for state, path in queue_dirs(args.queue).items():
+        print(f"{state}: {len(list(path.glob('*.json')))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs sweeps on several nodes through a job queue in a shared "
+                                                 "directory. Run submit once, then work on every node.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    submit_parser = subparsers.add_parser('submit', help="Writes the jobs of a domain's sweep into the queue")
+    submit_parser.add_argument('domain', choices=SWEEPS.keys())
+    submit_parser.add_argument('--shard-size', type=int, default=INSTANCES, help="Instances per job")
+    submit_parser.add_argument('--shard-file', help="File with the -i arguments of every shard, one per line "
+                                                    "(e.g., results/stp_workers.txt)")
+    submit_parser.add_argument('--skip-optimal', action='store_true',
+                               help="Skip the weight 1 WA* configurations when their optimal costs are known")
+    submit_parser.add_argument('--store', help="Optimal cost store file of --skip-optimal (defaults to the one of the "
+                                               "queue results, <queue>/data/optimal_costs.json), its costs are "
+                                               "copied into the store of the queue results")
+    submit_parser.set_defaults(func=submit)
+    work_parser = subparsers.add_parser('work', help="Claims and runs jobs until the queue is empty")
+    work_parser.add_argument('--binary', default=BINARY)
+    work_parser.add_argument('--lease', type=float, default=300,
+                             help="Seconds without a heartbeat after which a claimed job is requeued")
+    work_parser.add_argument('-j', '--jobs', type=int, default=1, help="Worker processes on this node")
+    work_parser.add_argument('--compress', choices=COMPRESSORS.keys(), help="Compress the logs as they are written")
+    work_parser.set_defaults(func=work_parallel)
+    status_parser = subparsers.add_parser('status', help="Prints the number of jobs in every state")
+    status_parser.set_defaults(func=status)
+    for subparser in [submit_parser, work_parser, status_parser]:
+        subparser.add_argument('queue', help="Shared queue directory")
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,18 @@
 #!/bin/bash
+set -o pipefail  # A pipeline into write_log fails if the solver fails
 
-OUTPUT_DIR="data/stp"
-weights=(1 1.2 1.5 2 5 10 20 50)
-epsilons=(1 0.99 0.9 0.75 0.5 0.25 0.1 0.01 0)
+source "$(dirname "$0")/sweep_grids.sh"
+weights=("${wstp_weights[@]}")
+ios_weights=("${wstp_ios_weights[@]}")
+REPEATS=${REPEATS:-1}  # Set REPEATS=k to run every search k times for timing analysis
+INSTANCES=${INSTANCES:-0-100}  # Set INSTANCES="$(cat results/wstp_subset.txt)" for a quick screening run
+COMPRESS=${COMPRESS:-}  # Set COMPRESS=gz, xz or zst to compress the logs as they are written
+TRACE_EVERY=${TRACE_EVERY:-}  # Set TRACE_EVERY=N to also write a progress trace of every search, sampled every N expansions
 
-OUTPUT_DIR="data/wstp"
-CMD="./src/bin/release/balance -d WSTP -ho wmd -hg md -i 0-100"
+OUTPUT_DIR=${OUTPUT_DIR:-data/wstp}
+CMD="./src/bin/release/balance -d WSTP -ho wmd -hg md -i $INSTANCES -r $REPEATS"
+
+check_compress || exit 1
 
 # Move to base dir and make dirs for data and heuristics
 cd "$(dirname "$0")/.." || exit 1
@@ -13,26 +20,28 @@ mkdir -p $OUTPUT_DIR
 
 # Run heuristic-init for h/C* and GDRC calculations
 echo "Running initial heuristic"
-$CMD --no-run -w 1 -e 1 > "$OUTPUT_DIR/wstp_heu_init.out"
+$CMD --no-run -w 1 -e 1 | write_log "$OUTPUT_DIR/wstp_heu_init.out" || failed "$OUTPUT_DIR/wstp_heu_init.out"
 
 # GBFS
 for epsilon in "${epsilons[@]}"; do
   echo "Running GBFS with e=$epsilon"
-  $CMD -a GBFS -w 1 -e "$epsilon" > "$OUTPUT_DIR/wstp_gbfs_e${epsilon}.out"
+  $CMD -a GBFS -w 1 -e "$epsilon" $(trace_args "wstp_gbfs_e${epsilon}") | write_log "$OUTPUT_DIR/wstp_gbfs_e${epsilon}.out" || failed "$OUTPUT_DIR/wstp_gbfs_e${epsilon}.out"
 done
 
 # Weighted A*
 for weight in "${weights[@]}"; do
   for epsilon in "${epsilons[@]}"; do
     echo "Running WA* with w=$weight and e=$epsilon"
-    $CMD -a WA -w "$weight" -e "$epsilon" > "$OUTPUT_DIR/wstp_wa_w${weight}_e${epsilon}.out"
+    $CMD -a WA -w "$weight" -e "$epsilon" $(trace_args "wstp_wa_w${weight}_e${epsilon}") | write_log "$OUTPUT_DIR/wstp_wa_w${weight}_e${epsilon}.out" || failed "$OUTPUT_DIR/wstp_wa_w${weight}_e${epsilon}.out"
   done
 done
 
 # IOS
-for weight in "${weights[@]}"; do
+for weight in "${ios_weights[@]}"; do
   for epsilon in "${epsilons[@]}"; do
     echo "Running IOS with w=$weight and e=$epsilon"
-    $CMD -a IOS -w "$weight" -e "$epsilon" > "$OUTPUT_DIR/wstp_ios_w${weight}_e${epsilon}.out"
+    $CMD -a IOS -w "$weight" -e "$epsilon" $(trace_args "wstp_ios_w${weight}_e${epsilon}") | write_log "$OUTPUT_DIR/wstp_ios_w${weight}_e${epsilon}.out" || failed "$OUTPUT_DIR/wstp_ios_w${weight}_e${epsilon}.out"
   done
 done
+
+exit $status
@@ -64,8 +64,17 @@ public:
                 if (this->pdb.back() != '/') {
                     this->pdb += '/';
                 }
+            } else if (arg == "-r" || arg == "--repeat") {
+                ArgParameters::verifyValidFlagValue(argc, argv, ++i);
+                this->repeats = std::stoi(argv[i]);
             } else if (arg == "-n" || arg == "--no-run") {
                 this->norun = true;
+            } else if (arg == "-t" || arg == "--trace") {
+                ArgParameters::verifyValidFlagValue(argc, argv, ++i);
+                this->trace = argv[i];
+            } else if (arg == "-te" || arg == "--trace-every") {
+                ArgParameters::verifyValidFlagValue(argc, argv, ++i);
+                this->traceEvery = std::stoll(argv[i]);
             } else {
                 std::cerr << "Error: Unknown argument: " << arg << std::endl;
                 exit(EXIT_FAILURE);
@@ -89,6 +98,15 @@ public:
             std::cerr << "Missing or invalid value for epsilon" << std::endl;
             exit(EXIT_FAILURE);
         }
+
+        if (repeats < 1) {
+            std::cerr << "Invalid value for repeat" << std::endl;
+            exit(EXIT_FAILURE);
+        }
+        if (traceEvery < 1) {
+            std::cerr << "Invalid value for trace-every" << std::endl;
+            exit(EXIT_FAILURE);
+        }
     }
 
     bool hasAlgorithm(const std::string &alg) const {
@@ -165,7 +183,10 @@ public:
         std::cout << "  -w, --weight <W>                   Specify the heuristic weight (must be >= 1).\n";
         std::cout << "  -e, --epsilon <E|N/D>              Specify epsilon as a decimal or fraction (N/D format).\n";
         std::cout << "  -p, --pdb <DIR>                    Specify the directory containing PDB files.\n";
+        std::cout << "  -r, --repeat <K>                   Run each search K times and print every time sample.\n";
         std::cout << "  -n, --no-run                       Disable actual execution (heuristic calculation mode).\n";
+        std::cout << "  -t, --trace <FILE>                 Write a progress trace of every search into FILE.\n";
+        std::cout << "  -te, --trace-every <N>             Sample the trace every N expansions (default 1000).\n";
         std::cout << "  --help                             Show this help message and exit.\n\n";
         std::cout << "Examples:\n";
         std::cout
@@ -183,7 +204,10 @@ public:
     double epsilon = -1;
     double weight = -1;
     std::string pdb;
+    int repeats = 1;
     bool norun = false;
+    std::string trace;
+    long long traceEvery = 1000;
 
 private:
     static void verifyValidFlagValue(int argc, char *argv[], int index) {
@@ -152,6 +152,12 @@ public:
 
     uint64_t GetNodesTouched() const { return nodesTouched; }
 
+    // The cost of the incumbent solution: the one found by the greedy phase, less the largest reduction of its cost
+    // found by the optimal phase (DBL_MAX during the greedy phase)
+    double GetBestSolution() const { return bestSolution - solutionReduction; }
+
+    bool IsGreedyPhase() const { return bestSolution == DBL_MAX; }
+
     void LogFinalStats(StatCollection *) {}
 
     void OpenGLDraw() const;
@@ -0,0 +1,172 @@
+#ifndef SRC_PAPER_SEARCHTELEMETRY_H
+#define SRC_PAPER_SEARCHTELEMETRY_H
+
+#include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <cstdint>
+#include <cstdio>
+#include <iostream>
+#include <string>
+#include <vector>
+#include "IOS.h"
+
+// Peak sizes of the open and closed lists during a search, which the search algorithms do not keep themselves
+struct ListPeaks {
+    uint64_t open = 0;
+    uint64_t closed = 0;
+
+    template<class search>
+    void Update(search &alg) {
+        uint64_t openSize = alg.GetNumOpenItems();
+        open = std::max(open, openSize);
+        closed = std::max(closed, (uint64_t) alg.GetNumItems() - openSize);
+    }
+};
+
+// Samples the progress of searches into a sidecar file of the log (-t), every N expansions (-te) and when a search
+// ends. Every run writes the [D] line of its log, and every search "[I] id: <id>" and "[A] alg: <alg>" lines, followed
+// by one line per sample: expanded, elapsed seconds, f and h of the next node to expand, lowest h expanded so far,
+// phase (g and o for the greedy and optimal phases of IOS, - otherwise) and the best solution cost found so far.
+// Changes of the phase or of the best solution cost are always sampled, so they are exact in the trace. The file is
+// appended to, like the logs of runs split into instance batches, so it has the searches of all the runs of its log.
+// The drivers trace an extra run of every search after its timed repeats (-r), so the times of the log do not include
+// the cost of tracing.
+class SearchTrace {
+public:
+    SearchTrace(const std::string &fileName, uint64_t every) : every(every) {
+        if (fileName.empty()) {
+            return;
+        }
+        file = fopen(fileName.c_str(), "a");
+        if (file == nullptr) {
+            std::cerr << "Error: Cannot open trace file: " << fileName << std::endl;
+            exit(EXIT_FAILURE);
+        }
+    }
+
+    ~SearchTrace() {
+        if (file != nullptr) {
+            fclose(file);
+        }
+    }
+
+    SearchTrace(const SearchTrace &) = delete;
+
+    SearchTrace &operator=(const SearchTrace &) = delete;
+
+    bool Enabled() const { return file != nullptr; }
+
+    void Print(const std::string &line) {
+        if (file != nullptr) {
+            fprintf(file, "%s\n", line.c_str());
+        }
+    }
+
+    // Starts the trace of a search, returns nullptr (no tracing) if there is no trace file
+    SearchTrace *Start(int id, const char *alg) {
+        if (file == nullptr) {
+            return nullptr;
+        }
+        fprintf(file, "[I] id: %d\n[A] alg: %s\n", id, alg);
+        next = 0;
+        minH = INFINITY;
+        lastPhase = 0;
+        lastIncumbent = INFINITY;
+        startTime = std::chrono::steady_clock::now();
+        return this;
+    }
+
+    // Called before every expansion
+    template<class search>
+    void Step(search &alg, char phase, double incumbent) {
+        if (alg.GetNumOpenItems() > 0) {
+            minH = std::min(minH, alg.GetOpenItem(0).h);
+        }
+        if (alg.GetNodesExpanded() >= next || phase != lastPhase || incumbent < lastIncumbent) {
+            Sample(alg, phase, incumbent);
+            next = alg.GetNodesExpanded() + every;
+        }
+    }
+
+    template<class search>
+    void End(search &alg, char phase, double incumbent) {
+        if (alg.GetNodesExpanded() + every != next || phase != lastPhase || incumbent < lastIncumbent) {
+            Sample(alg, phase, incumbent);
+        }
+        fflush(file);
+    }
+
+private:
+    template<class search>
+    void Sample(search &alg, char phase, double incumbent) {
+        double f = INFINITY, h = INFINITY;
+        if (alg.GetNumOpenItems() > 0) {
+            f = alg.GetOpenItem(0).f;
+            h = alg.GetOpenItem(0).h;
+        }
+        double elapsed = std::chrono::duration<double>(std::chrono::steady_clock::now() - startTime).count();
+        fprintf(file, "%llu %1.6f %g %g %g %c %g\n", (unsigned long long) alg.GetNodesExpanded(), elapsed, f, h, minH,
+                phase, incumbent);
+        lastPhase = phase;
+        lastIncumbent = incumbent;
+    }
+
+    FILE *file = nullptr;
+    uint64_t every;
+    uint64_t next = 0;
+    double minH = INFINITY;
+    char lastPhase = 0;
+    double lastIncumbent = INFINITY;
+    std::chrono::steady_clock::time_point startTime;
+};
+
+// What GetPathWithPeaks needs beyond the interface shared by TemplateAStar, GBFS and ImprovedOptimisticSearch: whether
+// the search has to be stepped after InitializeSearch (which returns whether it can start, but whether it is already
+// done for IOS), and the phase and the incumbent solution cost sampled by the trace
+template<class search>
+bool SearchStarted(search &, bool initialized) { return initialized; }
+
+template<class state, class action, class environment>
+bool SearchStarted(ImprovedOptimisticSearch<state, action, environment> &, bool done) { return !done; }
+
+template<class search>
+char SearchPhase(search &) { return '-'; }
+
+template<class state, class action, class environment>
+char SearchPhase(ImprovedOptimisticSearch<state, action, environment> &alg) { return alg.IsGreedyPhase() ? 'g' : 'o'; }
+
+template<class search>
+double SearchIncumbent(search &) { return INFINITY; }
+
+template<class state, class action, class environment>
+double SearchIncumbent(ImprovedOptimisticSearch<state, action, environment> &alg) {
+    return alg.IsGreedyPhase() ? INFINITY : alg.GetBestSolution();
+}
+
+// Same as the GetPath of WA*, GBFS and IOS, but also records the peak list sizes after every expansion, and samples
+// the trace if given. Recording the peaks costs two list size lookups per expansion, which is not measurable next to
+// the expansion itself, so the timed searches record them too.
+template<class search, class environment, class state>
+ListPeaks GetPathWithPeaks(search &alg, environment *env, const state &from, const state &to,
+                           std::vector<state> &thePath, SearchTrace *trace = nullptr) {
+    ListPeaks peaks;
+    if (!SearchStarted(alg, alg.InitializeSearch(env, from, to, thePath))) {
+        return peaks;
+    }
+    bool done = false;
+    while (!done) {
+        peaks.Update(alg);
+        if (trace != nullptr) {
+            trace->Step(alg, SearchPhase(alg), SearchIncumbent(alg));
+        }
+        done = alg.DoSingleSearchStep(thePath);
+    }
+    peaks.Update(alg);
+    if (trace != nullptr) {
+        trace->End(alg, SearchPhase(alg), thePath.empty() ? INFINITY : env->GetPathLength(thePath));
+    }
+    return peaks;
+}
+
+#endif //SRC_PAPER_SEARCHTELEMETRY_H
@@ -9,6 +9,8 @@
 #include "TemplateAStar.h"
 #include "GBFS.h"
 #include "IOS.h"
+#include "SearchTelemetry.h"
+#include <sstream>
 
 namespace balance_toh {
 void unsupportedPdbExit(const std::string &heuristic) {
@@ -128,11 +130,15 @@ double hPhi(double h, double g) {
 
 template<int N>
 void testToh(const ArgParameters &ap) {
-    std::cout << "[D] domain: TOH-" << N
-              << "; heuristic-optimal: " << ap.heuristic_optimal
-              << "; heuristic-greedy: " << ap.heuristic_greedy
-              << "; weight: " << ap.weight
-              << "; epsilon: " << ap.epsilon << std::endl;
+    std::ostringstream config;
+    config << "[D] domain: TOH-" << N
+           << "; heuristic-optimal: " << ap.heuristic_optimal
+           << "; heuristic-greedy: " << ap.heuristic_greedy
+           << "; weight: " << ap.weight
+           << "; epsilon: " << ap.epsilon;
+    std::cout << config.str() << std::endl;
+    SearchTrace trace(ap.trace, ap.traceEvery);
+    trace.Print(config.str());
     TOHState<N> goal;
     auto heuristic = getBalanceTohHeuristic(ap.heuristic_optimal, ap.heuristic_greedy, ap.epsilon, goal);
     std::vector<TOHState<N>> solutionPath;
@@ -149,38 +155,83 @@ void testToh(const ArgParameters &ap) {
             continue;
         }
         if (ap.hasAlgorithm("WA")) {
-            TemplateAStar<TOHState<N>, TOHMove, TOH<N>> astar;
-            astar.SetHeuristic(heuristic.get());
-            astar.SetWeight(ap.weight);
-            timer.StartTimer();
-            astar.GetPath(&env, start, goal, solutionPath);
-            timer.EndTimer();
-            printf("[R] alg: wa; solution: %1.0f; expanded: %llu; time: %1.6fs\n", env.GetPathLength(solutionPath),
-                   astar.GetNodesExpanded(), timer.GetElapsedTime());
+            // The timed repeats, then an untimed run writing the trace (if any)
+            for (int r = 0; r < ap.repeats + trace.Enabled(); ++r) {
+                TemplateAStar<TOHState<N>, TOHMove, TOH<N>> astar;
+                astar.SetHeuristic(heuristic.get());
+                astar.SetWeight(ap.weight);
+                if (r == ap.repeats) {
+                    GetPathWithPeaks(astar, &env, start, goal, solutionPath, trace.Start(i, "wa"));
+                    continue;
+                }
+                timer.StartTimer();
+                ListPeaks peaks = GetPathWithPeaks(astar, &env, start, goal, solutionPath);
+                timer.EndTimer();
+                if (r == 0) {
+                    printf("[R] alg: wa; solution: %1.0f; expanded: %llu; time: %1.6fs; touched: %llu; "
+                           "unique-expanded: %llu; memory: %d; peak-open: %llu; peak-closed: %llu\n",
+                           env.GetPathLength(solutionPath), astar.GetNodesExpanded(), timer.GetElapsedTime(),
+                           astar.GetNodesTouched(), astar.GetUniqueNodesExpanded(), astar.GetMemoryUsage(),
+                           peaks.open, peaks.closed);
+                }
+                if (ap.repeats > 1) {
+                    printf("[T] alg: wa; sample: %d; time: %1.6fs\n", r, timer.GetElapsedTime());
+                }
+            }
         }
         if (ap.hasAlgorithm("GBFS")) {
-            GBFS::GBFS<TOHState<N>, TOHMove, TOH<N>> gbfs;
-            gbfs.SetHeuristic(heuristic.get());
-            timer.StartTimer();
-            gbfs.GetPath(&env, start, goal, solutionPath);
-            timer.EndTimer();
-            printf("[R] alg: gbfs; solution: %1.0f; expanded: %llu; time: %1.6fs\n", env.GetPathLength(solutionPath),
-                   gbfs.GetNodesExpanded(), timer.GetElapsedTime());
+            for (int r = 0; r < ap.repeats + trace.Enabled(); ++r) {
+                GBFS::GBFS<TOHState<N>, TOHMove, TOH<N>> gbfs;
+                gbfs.SetHeuristic(heuristic.get());
+                if (r == ap.repeats) {
+                    GetPathWithPeaks(gbfs, &env, start, goal, solutionPath, trace.Start(i, "gbfs"));
+                    continue;
+                }
+                timer.StartTimer();
+                ListPeaks peaks = GetPathWithPeaks(gbfs, &env, start, goal, solutionPath);
+                timer.EndTimer();
+                if (r == 0) {
+                    printf("[R] alg: gbfs; solution: %1.0f; expanded: %llu; time: %1.6fs; touched: %llu; "
+                           "unique-expanded: %llu; memory: %d; peak-open: %llu; peak-closed: %llu\n",
+                           env.GetPathLength(solutionPath), gbfs.GetNodesExpanded(), timer.GetElapsedTime(),
+                           gbfs.GetNodesTouched(), gbfs.GetUniqueNodesExpanded(), gbfs.GetMemoryUsage(),
+                           peaks.open, peaks.closed);
+                }
+                if (ap.repeats > 1) {
+                    printf("[T] alg: gbfs; sample: %d; time: %1.6fs\n", r, timer.GetElapsedTime());
+                }
+            }
         }
         if (ap.hasAlgorithm("IOS")) {
-            ImprovedOptimisticSearch<TOHState<N>, TOHMove, TOH<N>> ios;
-            ios.SetGreedyHeuristic(heuristic.get());
-            ios.SetOptimalHeuristic(heuristic->GetOptimalHeuristic());
-            ios.SetOptimalityBound(ap.weight);
-            double weight = 2 * ap.weight - 1;
-            ios.SetWeight(weight);
-            ios.SetPhi(([=](double x, double y) { return y / (weight) + x; }));
-            timer.StartTimer();
-            ios.GetPath(&env, start, goal, solutionPath);
-            timer.EndTimer();
-            printf("[R] alg: ios; solution: %1.0f; expanded: %llu; time: %1.6fs\n", env.GetPathLength(solutionPath),
-                   ios.GetNodesExpanded(), timer.GetElapsedTime());
+            for (int r = 0; r < ap.repeats + trace.Enabled(); ++r) {
+                ImprovedOptimisticSearch<TOHState<N>, TOHMove, TOH<N>> ios;
+                ios.SetGreedyHeuristic(heuristic.get());
+                ios.SetOptimalHeuristic(heuristic->GetOptimalHeuristic());
+                ios.SetOptimalityBound(ap.weight);
+                double weight = 2 * ap.weight - 1;
+                ios.SetWeight(weight);
+                ios.SetPhi(([=](double x, double y) { return y / (weight) + x; }));
+                if (r == ap.repeats) {
+                    GetPathWithPeaks(ios, &env, start, goal, solutionPath, trace.Start(i, "ios"));
+                    continue;
+                }
+                timer.StartTimer();
+                ListPeaks peaks = GetPathWithPeaks(ios, &env, start, goal, solutionPath);
+                timer.EndTimer();
+                if (r == 0) {
+                    printf("[R] alg: ios; solution: %1.0f; expanded: %llu; time: %1.6fs; touched: %llu; "
+                           "unique-expanded: %llu; memory: %d; peak-open: %llu; peak-closed: %llu\n",
+                           env.GetPathLength(solutionPath), ios.GetNodesExpanded(), timer.GetElapsedTime(),
+                           ios.GetNodesTouched(), ios.GetUniqueNodesExpanded(), ios.GetMemoryUsage(),
+                           peaks.open, peaks.closed);
+                }
+                if (ap.repeats > 1) {
+                    printf("[T] alg: ios; sample: %d; time: %1.6fs\n", r, timer.GetElapsedTime());
+                }
+            }
         }
+        // Flush the results of every instance, so they are kept if the run is killed
+        fflush(stdout);
     }
 }
 
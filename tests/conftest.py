@@ -0,0 +1,40 @@
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+# The analysis and sweep scripts import each other as top-level modules, as when run with python3 <dir>/<script>.py
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / 'analysis'), str(ROOT / 'scripts')]
+
+FAKE_SOLVER = """#!{python}
+import os
+import sys
+import time
+sys.path.insert(0, {analysis!r})
+from instance_ranges import parse_instance_args
+# Prints the [I]/[R] lines of the -i instances, with 1000 * (id + 1) * weight expansions, after sleeping FAKE_SLEEP
+# seconds, and fails if FAKE_FAIL is set. Every run appends its arguments to the FAKE_RECORD file if it is set.
+if os.environ.get('FAKE_RECORD'):
+    with open(os.environ['FAKE_RECORD'], 'a') as record:
+        record.write(' '.join(sys.argv[1:]) + '\\n')
+time.sleep(float(os.environ.get('FAKE_SLEEP', 0)))
+weight = float(sys.argv[sys.argv.index('-w') + 1]) if '-w' in sys.argv else 1.0
+instance_args = sys.argv[sys.argv.index('-i') + 1:]
+instance_args = instance_args[:next((i for i, arg in enumerate(instance_args) if arg.startswith('-')), None)]
+for i in parse_instance_args(' '.join(instance_args)):
+    print(f"[I] id: {{i}}; instance: x")
+    print(f"[R] alg: wa; solution: 50; expanded: {{int(1000 * (i + 1) * weight)}}; time: 0.01s", flush=True)
+if os.environ.get('FAKE_FAIL'):
+    sys.exit("fake solver failure")
+"""
+
+
+@pytest.fixture
+def fake_solver(tmp_path):
+    # A stand-in for the balance binary, for the sweep and work queue scripts
+    binary = tmp_path / 'balance'
+    binary.write_text(FAKE_SOLVER.format(python=sys.executable, analysis=str(ROOT / 'analysis')))
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    return str(binary)
@@ -0,0 +1,73 @@
+from argparse import Namespace
+
+import pytest
+
+import adaptive_sweep
+from adaptive_sweep import prune_reason, read_progress, run_configuration
+
+
+def args(**overrides):
+    values = dict(max_expanded=None, max_time=None, batch_size=10, batch_timeout=None, trace_every=None)
+    values.update(overrides)
+    return Namespace(**values)
+
+
+def results(expanded, solution=50.0):
+    return [{'id': i, 'expanded': e, 'time': 0.01, 'solution': solution} for i, e in enumerate(expanded)]
+
+
+def test_grids_are_read_from_the_sweep_scripts_file():
+    assert adaptive_sweep.EPSILONS[0] == '1' and adaptive_sweep.EPSILONS[-1] == '0'
+    assert adaptive_sweep.SWEEPS['toh']['weights'] == ['1', '1.2', '1.5', '2', '5', '10']
+    assert len(list(adaptive_sweep.sweep_configurations('stp'))) == 9 + 8 * 9 + 7 * 9
+
+
+def test_only_spent_budgets_prune():
+    assert prune_reason(results([100] * 10), args()) is None
+    assert prune_reason(results([100] * 10), args(max_expanded=1000)) is None
+    assert prune_reason(results([100] * 10), args(max_expanded=999)) == 'expanded-budget'
+    assert prune_reason(results([100] * 10), args(max_time=0.09)) == 'time-budget'
+
+
+def test_run_configuration_prunes_over_budget_and_resumes(tmp_path, fake_solver):
+    log = tmp_path / 'stp_wa_w1_e1.out'
+    balance_args = ['-d', 'STP', '-a', 'WA', '-w', '1', '-e', '1']
+    solved, reason = run_configuration(log, balance_args, args(binary=fake_solver, max_expanded=100000))
+    # The first batch of 10 instances expands 55000 nodes, the second one 155000 more
+    assert reason == 'expanded-budget'
+    assert [result['id'] for result in solved] == list(range(20))
+    solved_again, reason_again = run_configuration(log, balance_args, args(binary=fake_solver))
+    assert reason_again == reason and len(solved_again) == 20
+    assert read_progress(log)[1] == reason
+    assert not log.with_suffix('.err').exists()
+
+
+def test_run_configuration_without_budgets_finishes_every_instance(tmp_path, fake_solver):
+    solved, reason = run_configuration(tmp_path / 'wa_w2.out', ['-a', 'WA', '-w', '2'], args(binary=fake_solver))
+    assert reason is None and [result['id'] for result in solved] == list(range(100))
+
+
+def test_run_configuration_resumes_the_missing_instances(tmp_path, fake_solver):
+    log = tmp_path / 'wa_w1.out'
+    log.write_text(''.join(f"[I] id: {i}; instance: x\n[R] alg: wa; solution: 50; expanded: 1; time: 0.01s\n"
+                           for i in [0, 1, 5, 7]))
+    solved, reason = run_configuration(log, ['-a', 'WA', '-w', '1'], args(binary=fake_solver, batch_size=50))
+    assert reason is None and [result['id'] for result in solved] == list(range(100))
+    assert log.read_text().count('[R]') == 100
+
+
+def test_failed_batch_keeps_the_solver_errors(tmp_path, fake_solver, monkeypatch, capsys):
+    monkeypatch.setenv('FAKE_FAIL', '1')
+    log = tmp_path / 'wa_w1.out'
+    solved, reason = run_configuration(log, ['-a', 'WA', '-w', '1'], args(binary=fake_solver))
+    assert reason == 'batch-failed' and len(solved) == 10
+    assert 'fake solver failure' in log.with_suffix('.err').read_text()
+    assert 'fake solver failure' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('ids', [[3, 1, 2], [0, 0, 1]])
+def test_read_progress_uses_the_parsed_ids(tmp_path, ids):
+    log = tmp_path / 'wa.out'
+    log.write_text(''.join(f"[I] id: {i}; instance: x\n[R] alg: wa; solution: 50; expanded: 1; time: 0.01s\n"
+                           for i in ids))
+    assert [result['id'] for result in read_progress(log)[0]] == sorted(set(ids))
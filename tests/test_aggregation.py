@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregation import (iter_log_files, merge_aggregates, finalize_aggregate, partial_aggregate, stream_summary,
+                         summarize_results, summary_pivot, weighted_mean)
+
+
+def results_df(seed=0, rows=200):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'alg': rng.choice(['wa', 'ios', 'gbfs'], rows),
+        'heuristic-optimal': 'md',
+        'heuristic-greedy': rng.choice(['md', 'wmd'], rows),
+        'weight': rng.choice([1.0, 2.0, 5.0], rows),
+        'epsilon': rng.choice([0.0, 0.5, 1.0], rows),
+        'id': rng.integers(0, 100, rows),
+        'expanded': rng.integers(1, 10 ** 6, rows),
+        'quality': rng.uniform(1, 2, rows),
+        'time': rng.uniform(0, 10, rows),
+        'peak-open': rng.integers(1, 1000, rows).astype(float),
+    })
+    df.loc[df['alg'] == 'ios', 'peak-open'] = np.nan  # Only reported by WA* and GBFS
+    return df
+
+
+def test_merged_chunks_equal_full_pass():
+    df = results_df()
+    full = summarize_results(df)
+    streamed = stream_summary(df.iloc[i:i + 37] for i in range(0, len(df), 37))
+    pd.testing.assert_frame_equal(full, streamed)
+
+
+def test_merge_is_order_independent():
+    df = results_df()
+    left, right = partial_aggregate(df.iloc[:80]), partial_aggregate(df.iloc[80:])
+    pd.testing.assert_frame_equal(finalize_aggregate(merge_aggregates(left, right)),
+                                  finalize_aggregate(merge_aggregates(right, left)))
+
+
+def test_finalize_matches_pandas():
+    df = results_df()
+    summary = summarize_results(df).set_index(['alg', 'heuristic-optimal', 'heuristic-greedy', 'weight', 'epsilon'])
+    grouped = df.groupby(['alg', 'heuristic-optimal', 'heuristic-greedy', 'weight', 'epsilon'])
+    assert (summary['count'] == grouped.size()).all()
+    assert (summary['unique'] == grouped['id'].nunique()).all()
+    assert np.allclose(summary['expanded'], grouped['expanded'].mean())
+    assert np.allclose(summary['expanded-std'], grouped['expanded'].std(ddof=0))
+    assert (summary['time-max'] == grouped['time'].max()).all()
+    assert np.allclose(summary['peak-open'], grouped['peak-open'].mean(), equal_nan=True)
+
+
+def test_summary_pivot_weights_by_count():
+    summary_df = pd.DataFrame({'heuristic-greedy': ['md', 'wmd'], 'weight': [2.0, 2.0], 'expanded': [10.0, 40.0],
+                               'quality': [1.0, np.nan], 'count': [3, 1]})
+    pivot = summary_pivot(summary_df, 'weight')
+    assert pivot.loc[2.0, 'expanded'] == pytest.approx(17.5)
+    assert pivot.loc[2.0, 'quality'] == pytest.approx(1.0)
+    assert pivot.loc[2.0, 'count'] == 4
+    assert weighted_mean(summary_df, 'expanded') == pytest.approx(17.5)
+
+    by_weight = summary_pivot(summary_df, 'heuristic-greedy', 'weight')
+    assert by_weight.loc['wmd', ('expanded', 2.0)] == 40.0
+    assert np.isnan(by_weight.loc['wmd', ('quality', 2.0)])
+
+
+def test_iter_log_files_reads_the_latest_copy_of_every_log(tmp_path):
+    for name in ['a.out', 'a.out.gz', 'b.out.xz', 'notes.md']:
+        (tmp_path / name).touch()
+    os.utime(tmp_path / 'a.out.gz', (0, 0))  # A plain log written after its compressed copy, by a rerun
+    assert [path.name for path in iter_log_files(tmp_path)] == ['a.out', 'b.out.xz']
+    os.utime(tmp_path / 'a.out', (0, 0))
+    os.utime(tmp_path / 'a.out.gz', (1, 1))
+    assert [path.name for path in iter_log_files(tmp_path)] == ['a.out.gz', 'b.out.xz']
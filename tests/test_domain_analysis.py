@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+import stp_analysis
+import wstp_analysis
+from log_compression import compress_dir
+from stp_instances import DISTANCES
+
+WEIGHTS = [1, 2, 5]
+EPSILONS = [1, 0]
+
+
+def write_sweep(data_dir, domain, ho, hg, solutions):
+    # Complete synthetic logs of every configuration of the tables, with admissible heuristics
+    rng = random.Random(0)
+    data_dir.mkdir(parents=True)
+    init = [f'[D] domain: {domain}; heuristic-optimal: {ho}; heuristic-greedy: {hg}; weight: 1; epsilon: 1']
+    for i, cost in enumerate(solutions):
+        init += [f'[I] id: {i}; instance: x',
+                 f'[R] alg: heuristic; init-ho: {cost - rng.randint(0, 9)}; init-hg: {cost - rng.randint(0, 19)}']
+    (data_dir / f'{domain}_heu_init.out').write_text('\n'.join(init) + '\n')
+    runs = [('gbfs', 1)] + [('wa', weight) for weight in WEIGHTS] + [('ios', weight) for weight in WEIGHTS]
+    for (alg, weight), epsilon in [(run, epsilon) for run in runs for epsilon in EPSILONS]:
+        lines = [f'[D] domain: {domain}; heuristic-optimal: {ho}; heuristic-greedy: {hg}; weight: {weight}; '
+                 f'epsilon: {epsilon}']
+        for i, cost in enumerate(solutions):
+            excess = 0 if alg == 'wa' and weight == 1 else rng.randint(0, int(cost * (min(weight, 2) - 1)))
+            lines += [f'[I] id: {i}; instance: x',
+                      f'[R] alg: {alg}; solution: {cost + excess}; expanded: {rng.randint(10, 10 ** 6)}; time: 0.5s']
+        (data_dir / f'{domain}_{alg}_w{weight}_e{epsilon}.out').write_text('\n'.join(lines) + '\n')
+
+
+def tables(tmp_path, monkeypatch, analysis, chunked):
+    monkeypatch.setattr(analysis, 'WEIGHTS', WEIGHTS, raising=False)
+    monkeypatch.setattr(analysis, 'CHUNKED', chunked, raising=False)
+    (tmp_path / 'results' / 'latex').mkdir(parents=True, exist_ok=True)
+    (tmp_path / 'results' / 'figures').mkdir(exist_ok=True)
+    analysis.main()
+    return {path.name: path.read_text() for path in (tmp_path / 'results' / 'latex').iterdir()}
+
+
+@pytest.mark.parametrize('analysis, domain, ho, hg, solutions', [
+    (wstp_analysis, 'wstp', 'wmd', 'md', wstp_analysis.SOLUTIONS),
+    (stp_analysis, 'stp', 'ridge', 'ridge1', DISTANCES),
+])
+def test_chunked_tables_match_the_full_ones(tmp_path, monkeypatch, analysis, domain, ho, hg, solutions):
+    monkeypatch.chdir(tmp_path)
+    write_sweep(tmp_path / 'data' / domain, domain, ho, hg, solutions)
+    # The chunked tables, first without the optimal cost store, are the same as the ones of the full results
+    chunked = tables(tmp_path, monkeypatch, analysis, True)
+    assert tables(tmp_path, monkeypatch, analysis, False) == chunked
+    assert tables(tmp_path, monkeypatch, analysis, True) == chunked
+
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_compressing_the_logs_keeps_the_tables(tmp_path, monkeypatch, chunked):
+    monkeypatch.chdir(tmp_path)
+    data_dir = tmp_path / 'data' / 'stp'
+    write_sweep(data_dir, 'stp', 'ridge', 'ridge1', DISTANCES)
+    plain = tables(tmp_path, monkeypatch, stp_analysis, chunked)
+    compress_dir(data_dir, '.gz')  # The plain logs are kept next to their compressed copies
+    assert len(list(data_dir.glob('*.out.gz'))) == len(list(data_dir.glob('*.out')))
+    assert tables(tmp_path, monkeypatch, stp_analysis, chunked) == plain
+    assert not any('#200' in table for table in plain.values())
@@ -0,0 +1,47 @@
+import sys
+
+import pytest
+
+import load_balancing
+from instance_ranges import format_instance_args, parse_instance_args
+from load_balancing import contiguous_schedule, lpt_schedule, makespan
+
+
+def test_lpt_balances_skewed_costs():
+    # Two expensive instances at the start of the range, which a contiguous split gives to the same worker
+    costs = {i: 1.0 for i in range(10)}
+    costs.update({0: 5.0, 1: 5.0})
+    assignment = lpt_schedule(costs, 2)
+    assert sorted(i for ids in assignment for i in ids) == list(range(10))
+    assert makespan(assignment, costs) == 9.0
+    assert makespan(contiguous_schedule(range(10), 2), costs) == 13.0
+
+
+def test_lpt_is_optimal_with_one_instance_per_worker():
+    costs = {0: 3.0, 1: 7.0, 2: 2.0}
+    assert lpt_schedule(costs, 3) == [[1], [0], [2]]
+    assert makespan(lpt_schedule(costs, 3), costs) == 7.0
+
+
+@pytest.mark.parametrize('ids, instance_args', [
+    ([0, 1, 2, 3], '0-4'),
+    ([7], '7'),
+    ([12, 3, 4, 5, 9, 10], '3-6 9-11 12'),
+])
+def test_instance_args_round_trip(ids, instance_args):
+    assert format_instance_args(ids) == instance_args
+    assert parse_instance_args(instance_args) == sorted(ids)
+
+
+def test_cold_start_without_init_logs_exits(monkeypatch):
+    monkeypatch.setattr(load_balancing, 'load_logs', lambda domain, dir_path: (None, None))
+    monkeypatch.setattr(sys, 'argv', ['load_balancing.py', 'stp', '4', '--cold-start'])
+    with pytest.raises(SystemExit, match='No init heuristic'):
+        load_balancing.main()
+
+
+def test_achieved_without_result_logs_exits(monkeypatch):
+    monkeypatch.setattr(load_balancing, 'load_logs', lambda domain, dir_path: (None, None))
+    monkeypatch.setattr(sys, 'argv', ['load_balancing.py', 'stp', '4', '--achieved', 'data/stp_lpt'])
+    with pytest.raises(SystemExit, match='No result logs in data/stp_lpt'):
+        load_balancing.main()
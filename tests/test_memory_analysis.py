@@ -0,0 +1,27 @@
+import itertools
+
+import pandas as pd
+
+import memory_analysis
+from memory_analysis import INSTANCES, generate_memory_figures
+from result_set import ResultSet
+
+
+def summary_df(pairs):
+    rows = [{'alg': 'wa', 'heuristic-optimal': ho, 'heuristic-greedy': hg, 'weight': weight, 'epsilon': epsilon,
+             'count': INSTANCES, 'memory': 1000 * weight}
+            for (ho, hg), weight, epsilon in itertools.product(pairs, [1.0, 2.0], [0.0, 1.0])]
+    return pd.DataFrame(rows)
+
+
+def test_one_figure_per_heuristic_pair(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'results' / 'figures').mkdir(parents=True)
+    lines = []
+    plot = memory_analysis.plt.plot
+    monkeypatch.setattr(memory_analysis.plt, 'plot', lambda x, y, **kwargs: (lines.append(y), plot(x, y, **kwargs)))
+    generate_memory_figures(ResultSet(summary_df([('10+2', '10+0'), ('8+4', '8+0')])), 'toh', 'wa')
+    generate_memory_figures(ResultSet(summary_df([('ridge', 'ridge1')])), 'stp', 'wa')
+    assert sorted(path.name for path in (tmp_path / 'results' / 'figures').iterdir()) == [
+        'stp_wa_memory.pdf', 'toh_10+2_wa_memory.pdf', 'toh_8+4_wa_memory.pdf']
+    assert len(lines) == 3 * 2 and all(y == [1000.0, 2000.0] for y in lines)  # Every pair has all its instances
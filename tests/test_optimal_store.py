@@ -0,0 +1,45 @@
+import pytest
+
+from optimal_store import (import_costs, load_store, missing_instances, require_costs, store_file,
+                           sync_optimal_costs)
+
+
+def test_store_is_next_to_the_data_directory(tmp_path):
+    assert store_file(tmp_path / 'data' / 'stp') == tmp_path / 'data' / 'optimal_costs.json'
+    assert store_file('queue/data/toh') == store_file('queue/data/stp')
+
+
+def test_sync_records_and_returns_all_known_costs(tmp_path):
+    store = store_file(tmp_path / 'stp')
+    assert sync_optimal_costs('stp', {0: 50, 1: 52}, 'a.out', store) == {0: 50.0, 1: 52.0}
+    assert sync_optimal_costs('stp', {2: 47}, 'b.out', store) == {0: 50.0, 1: 52.0, 2: 47.0}
+    assert sync_optimal_costs('toh', {0: 9}, 'c.out', store) == {0: 9.0}
+    assert load_store(store)['revision'] == 3
+    sync_optimal_costs('stp', {0: 50}, 'd.out', store)  # Nothing new, the store is not saved again
+    assert load_store(store)['revision'] == 3
+    assert missing_instances('stp', range(4), store) == [3]
+
+
+def test_mismatch_fails_and_names_both_sources(tmp_path):
+    store = store_file(tmp_path / 'stp')
+    sync_optimal_costs('stp', {0: 50}, 'a.out', store)
+    with pytest.raises(ValueError, match=r"id: 0 \(51 in b.out, 50.0 in a.out\)"):
+        sync_optimal_costs('stp', {0: 51}, 'b.out', store)
+    assert load_store(store)['costs']['stp']['default']['0']['cost'] == 50.0
+
+
+def test_import_costs_into_the_store_of_another_sweep(tmp_path):
+    source, target = store_file(tmp_path / 'data' / 'stp'), store_file(tmp_path / 'queue' / 'data' / 'stp')
+    sync_optimal_costs('stp', {0: 50, 1: 52}, 'a.out', source)
+    sync_optimal_costs('stp', {0: 51}, 'b.out', target)
+    with pytest.raises(ValueError, match="Inconsistent"):
+        import_costs('stp', source, target)
+    target.unlink()
+    import_costs('stp', source, target)
+    assert missing_instances('stp', range(2), target) == []
+
+
+def test_missing_costs_fail_clearly():
+    require_costs({0: 50.0, 1: 52.0}, [0, 1])
+    with pytest.raises(ValueError, match=r"instances \[2, 3\]"):
+        require_costs({0: 50.0, 1: 52.0}, [0, 1, 3, 2])
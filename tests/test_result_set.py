@@ -0,0 +1,51 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from aggregation import CONFIG_COLUMNS
+from result_set import ResultSet
+
+
+def results_df():
+    # Two instances of every configuration, shuffled
+    rows = [{'alg': alg, 'heuristic-optimal': 'ridge', 'heuristic-greedy': greedy, 'weight': weight, 'epsilon': epsilon,
+             'id': i, 'expanded': 100 * weight + i}
+            for alg, greedy, weight, epsilon, i in itertools.product(['gbfs', 'wa'], ['ridge1', 'ridge2'], [1.0, 2.0],
+                                                                     [0.0, 0.5], [0, 1])]
+    return pd.DataFrame(rows).sample(frac=1, random_state=0, ignore_index=True)
+
+
+def expected(df, **conditions):
+    mask = np.ones(len(df), dtype=bool)
+    for column, value in conditions.items():
+        column = column.replace('_', '-')
+        mask &= df[column].isin(value) if isinstance(value, list) else df[column] == value
+    return df[mask].sort_values(CONFIG_COLUMNS + ['id'], ignore_index=True)
+
+
+def test_leading_keys_are_one_slice():
+    result_set = ResultSet(results_df())
+    assert len(result_set.where(alg='wa').slices()) == 1
+    assert len(result_set.where(alg='wa', heuristic_greedy='ridge2').slices()) == 1
+    assert result_set.where(alg=['gbfs', 'wa']).slices() == [(0, len(result_set.df))]
+
+
+def test_trailing_keys_are_merged_slices():
+    df = results_df()
+    result_set = ResultSet(df)
+    selection = result_set.where(alg='wa', weight=2.0)
+    # Both epsilons (adjacent blocks) of every greedy heuristic, in the wa half of the sorted rows
+    assert selection.slices() == [(20, 24), (28, 32)]
+    pd.testing.assert_frame_equal(selection.frame().reset_index(drop=True), expected(df, alg='wa', weight=2.0))
+
+
+def test_single_configuration_and_value_conditions():
+    df = results_df()
+    result_set = ResultSet(df)
+    config = {'alg': 'gbfs', 'heuristic-optimal': 'ridge', 'heuristic-greedy': 'ridge1', 'weight': 1.0, 'epsilon': 0.5}
+    assert len(result_set.where(config).slices()) == 1
+    assert len(result_set.where(config)) == 2
+    assert len(result_set.where({**config, 'weight': 3.0})) == 0
+    pd.testing.assert_frame_equal(result_set.where(epsilon=0.0).where(id=1).frame().reset_index(drop=True),
+                                  expected(df, epsilon=0.0, id=1))
@@ -0,0 +1,53 @@
+import sys
+
+import numpy as np
+
+import stp_manhattan
+from optimal_store import store_file, sync_optimal_costs
+from stp_instances import DISTANCES, korf_instances
+from stp_manhattan import manhattan_distance, random_walk_states
+
+
+def naive_manhattan(state, weight=lambda tile: 1):
+    return sum(weight(tile) * (abs(location // 4 - tile // 4) + abs(location % 4 - tile % 4))
+               for location, tile in enumerate(state.tolist()) if tile != 0)
+
+
+def test_korf_instances_are_read_from_the_solver_source():
+    instances = korf_instances()
+    assert instances.shape == (100, 16)
+    assert list(instances[0]) == [14, 13, 15, 7, 11, 12, 9, 5, 6, 0, 2, 1, 4, 8, 10, 3]
+    assert list(instances[99]) == [11, 4, 0, 8, 6, 10, 5, 13, 12, 7, 14, 3, 1, 2, 9, 15]
+    assert (np.sort(instances, axis=1) == np.arange(16)).all()
+
+
+def test_manhattan_distance_matches_a_naive_implementation():
+    states = np.concatenate([korf_instances(), random_walk_states(100, 50)])
+    assert list(manhattan_distance(states)) == [naive_manhattan(state) for state in states]
+    assert list(manhattan_distance(states, 'heavy')) == [naive_manhattan(state, lambda tile: tile) for state in states]
+
+
+def test_manhattan_distance_is_admissible_with_the_parity_of_the_optimal_lengths():
+    md = manhattan_distance(korf_instances())
+    assert (md <= DISTANCES).all()
+    assert ((np.array(DISTANCES) - md) % 2 == 0).all()
+
+
+def test_random_walks_are_permutations():
+    states = random_walk_states(1000, 30)
+    assert (np.sort(states, axis=1) == np.arange(16)).all()
+    assert manhattan_distance(states).max() <= 30
+
+
+def test_main_reports_the_statistics_against_the_stored_optimal_costs(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, 'argv', ['stp_manhattan.py', '100', '20'])
+    stp_manhattan.main()
+    assert 'No optimal WSTP costs' in capsys.readouterr().out
+    costs = {i: float(heavy) for i, heavy in enumerate(manhattan_distance(korf_instances()[:10], 'heavy') + 10)}
+    sync_optimal_costs('wstp', costs, 'test', store_file(tmp_path / 'data' / 'wstp'))
+    stp_manhattan.main()
+    lines = capsys.readouterr().out.splitlines()
+    rows = lines[lines.index("h/C* and GDRC over the 10 Korf instances with known optimal costs") + 1:][:9]
+    hdiff = float(rows[0].split(' & ')[3])  # Epsilon 1, the heavy Manhattan distance
+    assert hdiff == round(np.mean([(cost - 10) / cost for cost in costs.values()]), 3) and hdiff < 1
@@ -0,0 +1,84 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from stp_instances import DISTANCES
+from stp_pdb import (STATE_BYTES, find_pdb_file, heuristic_stats, heuristic_values, load_pdb, random_states,
+                     rank_states)
+
+
+def pattern_states(distinct, locations):
+    # States with the pattern tiles at the given locations and the other tiles in the remaining ones
+    states = []
+    for pattern_locations in locations:
+        free = [location for location in range(16) if location not in pattern_locations]
+        state = np.empty(16, dtype=np.uint8)
+        state[list(pattern_locations)] = distinct
+        state[free] = [tile for tile in range(16) if tile not in distinct]
+        states.append(state)
+    return np.array(states)
+
+
+def write_pdb(file_path, distinct, values, lookup_type=0):
+    # The layout of LexPermutationPDB::Save with 8 bits per entry
+    state = np.zeros(STATE_BYTES, dtype=np.uint8).tobytes()
+    words = (len(values) + 7) // 8
+    with open(file_path, 'wb') as f:
+        f.write(np.array([lookup_type], dtype='<i4').tobytes() + state)
+        f.write(np.array([len(values), words], dtype='<u8').tobytes())
+        f.write(np.pad(np.asarray(values, dtype=np.uint8), (0, words * 8 - len(values))).tobytes())
+        f.write(np.array([16, len(values)], dtype='<u8').tobytes() + state)
+        f.write(np.array([len(distinct)], dtype='<u8').tobytes() + np.array(distinct, dtype='<i4').tobytes())
+
+
+def test_ranks_are_the_lexicographic_order_of_the_pattern_locations():
+    distinct = [0, 3, 7]
+    locations = list(itertools.permutations(range(16), len(distinct)))
+    assert list(rank_states(pattern_states(distinct, locations), np.array(distinct))) == list(range(len(locations)))
+
+
+def test_rank_of_the_goal_state():
+    # Locations 0, 1, 4, 5, 8 are ranked 0, 0, 2, 2, 4 among the remaining ones, with the multipliers
+    # FactorialUpperK(15 - x, 11): 32760, 2184, 156, 12, 1
+    goal = np.arange(16, dtype=np.uint8)[None, :]
+    assert rank_states(goal, np.array([0, 1, 4, 5, 8]))[0] == 2 * 156 + 2 * 12 + 4
+
+
+def test_load_pdb_reads_a_saved_pdb(tmp_path):
+    distinct = [0, 1, 2]
+    values = np.arange(16 * 15 * 14) % 251
+    write_pdb(tmp_path / 'stp_test_123_0.lex', distinct, values)
+    loaded_distinct, loaded_values = load_pdb(find_pdb_file(tmp_path, 'test', 0))
+    assert list(loaded_distinct) == distinct and (loaded_values == values).all()
+    states = random_states(100)
+    assert (heuristic_values(states, [(loaded_distinct, loaded_values)]) ==
+            values[rank_states(states, np.array(distinct))]).all()
+
+
+def test_load_pdb_rejects_compressed_and_corrupted_files(tmp_path):
+    write_pdb(tmp_path / 'compressed.lex', [0, 1], np.zeros(240), lookup_type=1)
+    with pytest.raises(ValueError, match='uncompressed'):
+        load_pdb(tmp_path / 'compressed.lex')
+    write_pdb(tmp_path / 'corrupted.lex', [0, 1], np.zeros(240))
+    data = bytearray((tmp_path / 'corrupted.lex').read_bytes())
+    data[4 + STATE_BYTES:4 + STATE_BYTES + 8] = np.array([1000], dtype='<u8').tobytes()  # More entries than words
+    (tmp_path / 'corrupted.lex').write_bytes(bytes(data))
+    with pytest.raises(ValueError, match='Corrupted'):
+        load_pdb(tmp_path / 'corrupted.lex')
+
+
+def test_find_pdb_file_needs_a_single_goal(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        find_pdb_file(tmp_path, 'ridge', 0)
+    write_pdb(tmp_path / 'stp_ridge_1_0.lex', [0, 1], np.zeros(240))
+    write_pdb(tmp_path / 'stp_ridge_2_0.lex', [0, 1], np.zeros(240))
+    with pytest.raises(ValueError, match='several goals'):
+        find_pdb_file(tmp_path, 'ridge', 0)
+
+
+def test_heuristic_stats_are_relative_to_the_optimal_costs():
+    costs = np.array(DISTANCES, dtype=np.float64)
+    hdiff, tau = heuristic_stats(costs - 2, np.zeros(len(costs)), 1, costs)
+    assert hdiff == pytest.approx(np.mean((costs - 2) / costs)) and hdiff < 1 and tau == pytest.approx(1)
+    assert heuristic_stats(costs, costs, 0.5, costs, -costs)[1] == pytest.approx(-1)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from subset_selection import random_baseline, rank_agreement, select_subset
+
+
+def matrices(seed=0, configs=12, instances=30):
+    # Configurations whose expansions differ by a per-configuration factor, with per-instance noise
+    rng = np.random.default_rng(seed)
+    scale = rng.uniform(1, 100, (configs, 1))
+    expanded = scale * rng.lognormal(0, 1, (1, instances)) * rng.uniform(0.8, 1.2, (configs, instances))
+    quality = 1 + rng.uniform(0, 0.5, (configs, 1)) * rng.uniform(0.5, 1.5, (configs, instances))
+    return {'expanded': expanded, 'quality': quality, 'time': expanded / 1000}
+
+
+def test_full_set_agrees_perfectly():
+    m = matrices()
+    assert rank_agreement(m, list(range(30))) == pytest.approx([1.0, 1.0])
+
+
+def test_selected_subset_beats_random_subsets():
+    m = matrices()
+    subset = select_subset(m, 5)
+    assert len(subset) == len(set(subset)) == 5
+    assert np.mean(rank_agreement(m, subset)) >= np.mean(random_baseline(m, 5))
@@ -0,0 +1,37 @@
+from timing_analysis import cell_timing_stats, instance_timing_stats, parse_timing_dir
+
+CONFIG = '[D] domain: stp; heuristic-optimal: md; heuristic-greedy: md; weight: 2; epsilon: 1\n'
+
+
+def result(instance, expanded, time, samples=()):
+    lines = f'[I] id: {instance}\n[R] alg: wa; solution: 50; expanded: {expanded}; time: {time}s\n'
+    for i, sample in enumerate(samples):
+        lines += f'[T] alg: wa; sample: {i}; time: {sample}s\n'
+    return lines
+
+
+def test_repeated_samples_replace_the_result_time(tmp_path):
+    (tmp_path / 'a.out').write_text(CONFIG + result(0, 100, 1.0, [1.0, 2.0, 3.0]) + result(1, 10, 0.5))
+    df = parse_timing_dir(tmp_path)
+    assert sorted(df[df['id'] == 0]['time']) == [1.0, 2.0, 3.0]
+    assert list(df[df['id'] == 1]['time']) == [0.5]
+
+
+def test_instance_in_several_files_is_not_duplicated(tmp_path):
+    # The same configuration and instance in two files (e.g., two batches of an adaptive sweep)
+    (tmp_path / 'a.out').write_text(CONFIG + result(0, 100, 1.0, [1.0, 2.0]))
+    (tmp_path / 'b.out').write_text(CONFIG + result(0, 100, 3.0, [3.0, 4.0]))
+    df = parse_timing_dir(tmp_path)
+    assert sorted(df['time']) == [1.0, 2.0, 3.0, 4.0]
+    instances = instance_timing_stats(df)
+    assert list(instances['samples']) == [4]
+    cells = cell_timing_stats(instances)
+    assert list(cells['instances']) == [1]
+    assert list(cells['time_median']) == [2.5]
+
+
+def test_outliers_are_filtered(tmp_path):
+    (tmp_path / 'a.out').write_text(CONFIG + result(0, 100, 1.0, [1.0, 1.1, 0.9, 1.0, 50.0]))
+    instances = instance_timing_stats(parse_timing_dir(tmp_path))
+    assert list(instances['outliers']) == [1]
+    assert abs(instances['time_filtered_mean'].iloc[0] - 1.0) < 1e-9
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from trace_analysis import BUDGETS, finalize_profiles, iter_searches, phases_df, stream_profiles
+
+CONFIG = '[D] domain: wstp; heuristic-optimal: wmd; heuristic-greedy: md; weight: 2; epsilon: 0.5\n'
+KEY = ('ios', 'wmd', 'md', 2.0, 0.5)
+
+
+def search(instance, samples):
+    # samples are (expanded, phase, incumbent), with h going down to 0 at the last sample
+    lines = f'[I] id: {instance}\n[A] alg: ios\n'
+    for i, (expanded, phase, incumbent) in enumerate(samples):
+        h = 10 * (len(samples) - 1 - i)
+        lines += f'{expanded} {expanded / 1000:.6f} {h} {h} {h} {phase} {incumbent}\n'
+    return lines
+
+
+SOLVED = [(0, 'g', 'inf'), (3, 'o', 120), (8, 'o', 110)]  # Greedy phase of 3 expansions, improved at 8
+
+
+def test_searches_keep_the_context_of_every_run(tmp_path):
+    # Two runs (e.g., two batches of an adaptive sweep) appended to the same trace
+    (tmp_path / 'a.trace').write_text(CONFIG + search(0, SOLVED) + CONFIG + search(1, SOLVED))
+    searches = list(iter_searches(tmp_path / 'a.trace'))
+    assert [context['id'] for context, _ in searches] == ['0', '1']
+    assert all(context['weight'] == '2' and context['alg'] == 'ios' for context, _ in searches)
+    samples = searches[0][1]
+    assert list(samples['expanded']) == [0, 3, 8] and list(samples['phase']) == ['g', 'o', 'o']
+    assert np.isinf(samples['incumbent'].iloc[0]) and samples['incumbent'].iloc[-1] == 110
+
+
+def test_profiles_at_the_budgets(tmp_path):
+    (tmp_path / 'a.trace').write_text(CONFIG + search(0, SOLVED) + search(1, [(0, 'g', 'inf'), (30, 'g', 'inf')]))
+    profiles = stream_profiles(tmp_path, {0: 100, 1: 100})
+    assert profiles[KEY]['searches'] == 2
+    profile_df = finalize_profiles(profiles).set_index('budget')
+    assert list(profile_df.index) == list(BUDGETS[:BUDGETS.searchsorted(30) + 1])
+    assert profile_df.loc[2, 'solved'] == 0 and profile_df.loc[5, 'solved'] == 0.5
+    assert profile_df.loc[5, 'quality'] == pytest.approx(1.2) and profile_df.loc[10, 'quality'] == pytest.approx(1.1)
+    phases = phases_df(profiles)
+    assert list(phases['greedy']) == [(3 + 30) / 2] and list(phases['optimal']) == [5 / 2]
+
+
+def test_rerun_search_is_counted_once(tmp_path):
+    # A batch killed during instance 1, which the next batch runs again
+    partial = search(1, [(0, 'g', 'inf'), (5, 'g', 'inf')])
+    (tmp_path / 'a.trace').write_text(CONFIG + search(0, SOLVED) + partial + CONFIG + search(1, SOLVED))
+    profiles = stream_profiles(tmp_path, {0: 100, 1: 100})
+    assert profiles[KEY]['searches'] == 2
+    assert finalize_profiles(profiles).set_index('budget').loc[10, 'solved'] == 1
@@ -0,0 +1,133 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from argparse import Namespace
+
+import work_queue
+from work_queue import claim, claims, queue_dirs, requeue_expired, run_job, server_time, work
+
+def make_queue(tmp_path, binary, jobs=('a', 'b')):
+    queue = tmp_path / 'queue'
+    dirs = queue_dirs(queue)
+    for path in dirs.values():
+        path.mkdir(parents=True)
+    for name in jobs:
+        job = {'domain': 'stp', 'output': f'data/stp/{name}.out', 'instances': '0-3', 'args': ['-a', 'WA']}
+        (dirs['pending'] / f'{name}.json').write_text(json.dumps(job))
+    return dirs, Namespace(queue=str(queue), binary=binary, lease=300, compress=None)
+
+
+def expire(claim_file, dirs, args):
+    old = server_time(args.queue, 'test') - 2 * args.lease
+    os.utime(claim_file, (old, old))
+    requeue_expired(dirs, args.lease, server_time(args.queue, 'test'))
+
+
+def test_workers_run_every_job_once(tmp_path, fake_solver):
+    dirs, args = make_queue(tmp_path, fake_solver)
+    work(args)
+    assert sorted(path.name for path in dirs['done'].iterdir()) == ['a.json', 'b.json']
+    assert not any(dirs['pending'].iterdir()) and not any(dirs['claimed'].iterdir())
+    output = tmp_path / 'queue' / 'data' / 'stp' / 'a.out'
+    assert output.read_text().count('[R]') == 3
+    assert not list(output.parent.glob('*.tmp'))
+
+
+def test_failed_solver_marks_the_job_failed(tmp_path, fake_solver, monkeypatch):
+    dirs, args = make_queue(tmp_path, fake_solver, ['a'])
+    monkeypatch.setenv('FAKE_FAIL', '1')
+    assert run_job(claim(dirs, 'w1'), dirs, args, 'w1') == 'failed'
+    assert (dirs['failed'] / 'a.json').exists()
+    assert not list((tmp_path / 'queue' / 'data' / 'stp').iterdir())
+
+
+def test_claims_have_unique_names_and_only_expired_ones_are_requeued(tmp_path, fake_solver):
+    dirs, args = make_queue(tmp_path, fake_solver)
+    first, second = claim(dirs, 'w1'), claim(dirs, 'w1')
+    assert first.name.startswith('a@w1-') and second.name.startswith('b@w1-')
+    assert claim(dirs, 'w2') is None
+    expire(first, dirs, args)
+    assert (dirs['pending'] / 'a.json').exists() and second.exists()
+    reclaimed = claim(dirs, 'w2')
+    assert reclaimed.name.startswith('a@w2-') and reclaimed != first
+
+
+def run_in_thread(claim_file, dirs, args, worker_id):
+    result = {}
+    runner = threading.Thread(target=lambda: result.update(state=run_job(claim_file, dirs, args, worker_id)))
+    runner.start()
+    time.sleep(0.5)
+    return runner, result
+
+
+def test_stale_worker_cannot_finish_a_reclaimed_job(tmp_path, fake_solver, monkeypatch):
+    dirs, args = make_queue(tmp_path, fake_solver, ['a'])
+    monkeypatch.setenv('FAKE_SLEEP', '1.5')
+    stale = claim(dirs, 'w1')
+    runner, result = run_in_thread(stale, dirs, args, 'w1')  # Its heartbeat is too slow to notice the loss
+    expire(stale, dirs, args)
+    live = claim(dirs, 'w2')
+    runner.join(10)
+    assert result['state'] == 'lost'
+    assert live.exists() and not any(dirs['done'].iterdir())
+    assert not list((tmp_path / 'queue' / 'data' / 'stp').iterdir())
+    monkeypatch.delenv('FAKE_SLEEP')
+    assert run_job(live, dirs, args, 'w2') == 'done'
+    assert (dirs['done'] / 'a.json').exists()
+    assert (tmp_path / 'queue' / 'data' / 'stp' / 'a.out').read_text().count('[R]') == 3
+
+
+def test_lost_job_stops_the_heartbeat_and_the_solver(tmp_path, fake_solver, monkeypatch):
+    dirs, args = make_queue(tmp_path, fake_solver, ['a'])
+    args.lease = 0.3  # Heartbeat every 0.1 seconds
+    monkeypatch.setenv('FAKE_SLEEP', '30')
+    stale = claim(dirs, 'w1')
+    started = time.monotonic()
+    runner, result = run_in_thread(stale, dirs, args, 'w1')
+    os.rename(stale, dirs['pending'] / 'a.json')  # Requeued by another worker
+    live = claim(dirs, 'w2')
+    runner.join(10)
+    assert result['state'] == 'lost'
+    assert time.monotonic() - started < 10
+    mtime = live.stat().st_mtime
+    time.sleep(0.3)
+    assert live.stat().st_mtime == mtime  # The stale heartbeat does not keep the new claim alive
+    assert work_queue.claimed_job_name(live) == 'a.json'
+    assert list(claims(dirs, 'a.json')) == [live]
+
+
+def test_claim_starts_the_lease_before_another_worker_can_requeue_it(tmp_path, fake_solver, monkeypatch):
+    dirs, args = make_queue(tmp_path, fake_solver, ['a'])
+    old = server_time(args.queue, 'test') - 2 * args.lease
+    os.utime(dirs['pending'] / 'a.json', (old, old))  # Submitted long ago
+    rename = os.rename
+
+    def rename_then_requeue(source, destination):
+        rename(source, destination)
+        requeue_expired(dirs, args.lease, server_time(args.queue, 'w2'))  # Another worker, right after the rename
+
+    monkeypatch.setattr(work_queue.os, 'rename', rename_then_requeue)
+    claim_file = claim(dirs, 'w1')
+    assert claim_file.exists() and not any(dirs['pending'].iterdir())
+
+
+def test_parallel_workers_run_every_job_once(tmp_path, fake_solver, monkeypatch):
+    dirs, args = make_queue(tmp_path, fake_solver, [])
+    names = [f'job{n}' for n in range(8)]
+    for n, name in enumerate(names):
+        job = {'domain': 'stp', 'output': f'data/stp/{name}.out', 'instances': '0-3', 'args': ['-a', 'WA', '-w', str(n)]}
+        (dirs['pending'] / f'{name}.json').write_text(json.dumps(job))
+    record = tmp_path / 'runs.txt'
+    monkeypatch.setenv('FAKE_RECORD', str(record))
+    monkeypatch.setenv('FAKE_SLEEP', '0.2')
+    worker = subprocess.run([sys.executable, work_queue.__file__, 'work', '--binary', args.binary, '-j', '2',
+                             args.queue], check=True, capture_output=True, text=True, timeout=60)
+    assert len({line.split(']')[0] for line in worker.stdout.splitlines()}) == 2  # Both processes ran jobs
+    runs = record.read_text().splitlines()
+    assert sorted(runs) == sorted(f'-a WA -w {n} -i 0-3' for n in range(len(names)))
+    assert sorted(path.stem for path in dirs['done'].iterdir()) == names
+    for name in names:
+        assert (tmp_path / 'queue' / 'data' / 'stp' / f'{name}.out').read_text().count('[R]') == 3